@@ -1,14 +1,19 @@
 import numpy as np
 import random
 from collections import deque
+import minesweeperLog
+import minesweeperMetrics
+import minesweeperProbability
 
-class CellState:
-    def __init__(self):
-        self.value = -1  # -1 = unknown, 9 = bomb, rest = number
-        self.known_clear = False
-        self.neighbor_bombs = 0  # how many neighbor bombs are accounted for
-        self.neighbor_clear = 0  # how many neighbor non-bombs are accounted for
-        self.updatecount = 0
+log = minesweeperLog.getLogger('ai1')
+
+# Cell state lives in flat arrays over the board padded with a one cell border, so the neighbors of
+# cell p are p + offset for the 8 offsets in self.offsets and no neighbor needs a bounds check. Border
+# cells hold OUTSIDE: they are never unknown, so they are never queued, and the counts they pick up from
+# their inner neighbors are never read.
+UNKNOWN = -1
+BOMB = 9
+OUTSIDE = -2
 
 class AI1:
 
@@ -20,9 +25,28 @@ class AI1:
         self.num_cols = numCols
         self.num_bombs = numBombs
 
-        self.queue = deque()
-        self.cells = [[CellState() for c in range(self.num_cols)] for r in range(self.num_rows)]
-        self.known_bombs = []
+        width = numCols + 2
+        self.width = width
+        self.offsets = (-width - 1, -width, -width + 1, -1, 1, width - 1, width, width + 1)
+
+        padded = np.full((numRows + 2, numCols + 2), OUTSIDE, dtype=np.int8)
+        padded[1:-1, 1:-1] = UNKNOWN
+        inside = np.pad(np.ones((numRows, numCols), dtype=np.int8), 1)
+        num_neighbors = sum(np.roll(inside, (dr, dc), axis=(0, 1)) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc)
+
+        self.value = padded.ravel()  # UNKNOWN, BOMB, a number or OUTSIDE
+        self.num_neighbors = num_neighbors.astype(np.int8).ravel()
+        self.neighbor_bombs = np.zeros(len(self.value), dtype=np.int8)  # how many neighbor bombs are accounted for
+        self.neighbor_clear = np.zeros(len(self.value), dtype=np.int8)  # how many neighbor non-bombs are accounted for
+        self.updated = np.zeros(len(self.value), dtype=bool)
+
+        self.queue = deque()  # flat indices of cells known to be safe
+        self.known_bombs = []  # in the order they were found, value BOMB marks them for membership tests
+
+        # exact mine probabilities for when we have to guess
+        self.probability = minesweeperProbability.MineProbability()
+
+        self.metrics = minesweeperMetrics.Metrics()
 
         self.prev_move = safeSquare
 
@@ -32,6 +56,13 @@ class AI1:
     def submit_final_answer_format(self, listOfBombs):
         return ("final_answer", listOfBombs)
 
+    def index(self, row, col):
+        return (row + 1) * self.width + col + 1
+
+    def square(self, p):
+        row, col = divmod(p, self.width)
+        return row - 1, col - 1
+
     def neighbors(self, row, col):
         for r in range(row - 1, row + 2):
             if r < 0 or r >= self.num_rows:
@@ -43,90 +74,101 @@ class AI1:
                     continue
                 yield r, c
 
-    def on_cell_update(self, row, col):
-        cell = self.cells[row][col]
-        if cell.value >= 0 and cell.value != 9:
-            assert cell.neighbor_bombs <= cell.value
-            assert cell.neighbor_clear <= 8 - cell.value
-            if cell.neighbor_bombs == cell.value:
+    # check a numbered cell's counts, queueing its neighbors as safe or appending newly known bombs to pending
+    def on_cell_update(self, p, pending):
+        value = self.value[p]
+        if 0 <= value < BOMB:
+            assert self.neighbor_bombs[p] <= value
+            assert self.neighbor_clear[p] <= 8 - value
+            if self.neighbor_bombs[p] == value:
                 # all neighboring bombs accounted for, rest must be clear
-                for r, c in self.neighbors(row, col):
-                    self.queue.append((r, c))
-                    # self.update(r, c)
-            if cell.neighbor_clear == len(list(self.neighbors(row, col))) - cell.value:
+                for offset in self.offsets:
+                    if self.value[p + offset] == UNKNOWN:
+                        self.queue.append(p + offset)
+            if self.neighbor_clear[p] == self.num_neighbors[p] - value:
                 # all neighbors accounted for, rest must be bombs
-                for r, c in self.neighbors(row, col):
-                    if self.cells[r][c].value == -1:
-                        self.cells[r][c].value = 9
-                        self.update(r, c)
-
-    def update(self, row, col):
-        cell = self.cells[row][col]
-
-        cell.updatecount += 1
-        assert cell.updatecount == 1
-
-        assert cell.value != -1
-
-        if cell.value == 9:
-            assert (row, col) not in self.known_bombs
-            self.known_bombs.append((row, col))
-
-        for r, c in self.neighbors(row, col):
-            neighbor = self.cells[r][c]
-            if cell.value == 9:
-                neighbor.neighbor_bombs += 1
-                assert neighbor.neighbor_bombs <= 8
-                self.on_cell_update(r, c)
+                for offset in self.offsets:
+                    if self.value[p + offset] == UNKNOWN:
+                        self.value[p + offset] = BOMB
+                        pending.append(p + offset)
+
+    # propagate a newly known cell, and every bomb it implies, through a worklist instead of recursion
+    def update(self, p):
+        pending = [p]
+        while pending:
+            p = pending.pop()
+
+            assert not self.updated[p]
+            self.updated[p] = True
+
+            value = self.value[p]
+            assert value != UNKNOWN
+
+            if value == BOMB:
+                self.known_bombs.append(self.square(p))
+                counts = self.neighbor_bombs
             else:
-                neighbor.neighbor_clear += 1
-                assert neighbor.neighbor_clear <= 8
-                self.on_cell_update(r, c)
-
-        self.on_cell_update(row, col)
-
-        # for r in self.cells:
-        #     print('|',end='')
-        #     for c in r:
-        #         s = f'{c.value}/{c.neighbor_clear}/{c.neighbor_bombs}'
-        #         # s = f'{c.value}/{c.neighbor_clear}'
-        #         s = s.rjust(6, ' ')
-        #         print(s , end='|')
-        #     print('')
-        # print('')
+                counts = self.neighbor_clear
+
+            for offset in self.offsets:
+                counts[p + offset] += 1
+                assert counts[p + offset] <= 8
+                self.on_cell_update(p + offset, pending)
+
+            self.on_cell_update(p, pending)
+
+    # The frontier constraints, in board order: for every numbered cell with an unknown neighbor, its unknown
+    # neighbors and how many of them are bombs. Found with array operations over the padded cell state, so
+    # only the frontier itself is walked in Python.
+    def constraints(self):
+        unknown = self.value == UNKNOWN
+        num_unknown = sum(np.roll(unknown, -offset) for offset in self.offsets)
+        numbered = (self.value >= 0) & (self.value < BOMB)
+        constraints = []
+        for p in np.flatnonzero(numbered & (num_unknown > 0)).tolist():
+            cells = frozenset(self.square(p + offset) for offset in self.offsets if unknown[p + offset])
+            constraints.append((cells, int(self.value[p] - self.neighbor_bombs[p])))
+        return constraints
 
     def choose_square(self):
         while self.queue:
-            to_open = self.queue.popleft()
-            row, col = to_open
-            if self.cells[row][col].value != -1: # already opened
+            p = self.queue.popleft()
+            if self.value[p] != UNKNOWN: # already opened
                 continue
-            print("From queue")
-            return row, col
-
-        # umm... we have no idea just choose random one I guess
-        print("We have to guess")
-        unopened_squares = []
-        for row in range(self.num_rows):
-            for col in range(self.num_cols):
-                if self.cells[row][col].value == -1 and (row,col) not in self.known_bombs:
-                    unopened_squares.append((row, col))
-        return random.choice(unopened_squares)
+            log.debug("From queue")
+            return self.square(p)
+
+        # umm... we have no idea, open the square least likely to be a bomb
+        log.debug("We have to guess")
+        unknown = self.value.reshape(self.num_rows + 2, self.width)[1:-1, 1:-1] == UNKNOWN
+        constraints = self.constraints()
+        to_open = self.probability.safest_cell(constraints, unknown, self.num_bombs - len(self.known_bombs))
+        if to_open is not None:
+            return to_open
+
+        # couldn't count the frontier exactly, just choose random one I guess
+        row, col = random.choice(np.argwhere(unknown))
+        return int(row), int(col)
 
     def performAI(self, board_state):
-        # update our known info
         row, col = self.prev_move
-        self.cells[row][col].value = board_state[row][col]
+        return self.performAIDelta([(self.prev_move, board_state[row][col])])
 
-        # trigger updates
-        self.update(row, col)
+    # revealed is a list of ((row, col), value) of the squares opened since the last move
+    def performAIDelta(self, revealed):
+        # update our known info and trigger updates
+        for (row, col), value in revealed:
+            p = self.index(row, col)
+            if self.value[p] == UNKNOWN:
+                self.value[p] = value
+                self.update(p)
 
         if len(self.known_bombs) == self.num_bombs:
-            print(f"List of bombs is {self.known_bombs}")
+            log.debug("List of bombs is %s", self.known_bombs)
             return self.submit_final_answer_format(self.known_bombs)
 
         to_open = self.choose_square()
-        print(f"Square to open is {to_open}")
+        log.debug("Square to open is %s", to_open)
         self.prev_move = to_open
 
         return self.open_square_format(to_open)
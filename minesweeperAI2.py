@@ -1,7 +1,14 @@
 import numpy as np
 import random
 from collections import deque
-from z3 import *
+import minesweeperBackends
+import minesweeperFrontier
+import minesweeperLog
+import minesweeperMetrics
+import minesweeperDeduction
+import minesweeperProbability
+
+log = minesweeperLog.getLogger('ai2')
 
 class CellState:
     def __init__(self):
@@ -11,10 +18,16 @@ class CellState:
         self.neighbor_clear = 0  # how many neighbor non-bombs are accounted for
         self.updatecount = 0
 
+# the backend the old encoding option of this AI stood for
+ENCODING_BACKENDS = {'bool': 'cdcl', 'int': 'backtracker'}
+
 class AI2:
 
+    # every neighbor of a 0 gets opened anyway, so the engine may uncover whole regions of 0s in one move
+    reveal_regions = True
+
     # Define settings upon initialization. Here you can specify
-    def __init__(self, numRows, numCols, numBombs, safeSquare):
+    def __init__(self, numRows, numCols, numBombs, safeSquare, backend='cdcl', persistent=False, prune_with_models=True, encoding=None):
 
         # game variables that can be accessed in any method in the class. For example, to access the number of rows, use "self.numRows"
         self.num_rows = numRows
@@ -23,7 +36,8 @@ class AI2:
         self.num_cells = self.num_rows * self.num_cols
 
         self.known_bombs = set()
-        self.board_state = None
+        self.board_state = [[-1] * numCols for row in range(numRows)] # our own view of the board, -1 = unopened
+        self.unknown = np.ones((numRows, numCols), dtype=bool) # neither revealed nor a known bomb, for guessing
 
         self.queue = deque()
         self.opened = set()
@@ -32,20 +46,47 @@ class AI2:
         self.prev_move = safeSquare
 
         self.dirty_tiles = set()
+        self.frontier = minesweeperFrontier.FrontierIndex(self.neighbors)
 
         self.total_sat_solve_steps = 0
         self.total_sat_solves = 0
         self.total_sat_variables = 0
-
-        self.vars = {}
-        for r in range(self.num_rows):
-            for c in range(self.num_cols):
-                var = Int('x_%d_%d' % (r,c))
-                self.vars[(r,c)] = var
+        self.total_component_cache_hits = 0
+        self.total_sat_probes_skipped = 0
+        self.cells_resolved = {stage: 0 for stage in minesweeperDeduction.STAGES} # cells decided by each stage of recompute
+        self.metrics = minesweeperMetrics.Metrics()
+
+        # component key -> candidates that were left undecided by exactly that component's constraints
+        self.component_cache = {}
+
+        # exact mine probabilities for when we have to guess
+        self.probability = minesweeperProbability.MineProbability()
+
+        # which minesweeperBackends.BACKENDS entry answers the SAT probes. encoding is the older way to ask for
+        # 'bool' (direct CNF, native CDCL solver) or 'int' (Int tactic chain, backtracker)
+        if encoding is not None:
+            backend = ENCODING_BACKENDS[encoding]
+        assert backend in minesweeperBackends.BACKENDS
+        self.backend = minesweeperBackends.BACKENDS[backend]
+
+        # every satisfying model proves its values possible, so a candidate is only probed for a value no model
+        # has shown yet (needs a backend that keeps models, the backtracker doesn't)
+        self.prune_with_models = prune_with_models
+
+        # persistent mode: one backend for the whole game. Every revealed number and every deduced
+        # cell is added to it exactly once, and candidates are probed under assumptions.
+        self.persistent = persistent
+        self.solver = self.backend(self.metrics) if persistent else None
+        self.constrained = set() # cells some constraint in self.solver mentions
+        self.asserted_value = set() # cells whose bomb/not-bomb value is in self.solver
+        self.asserted_number = set() # cells whose neighbor sum constraint is in self.solver
 
     def open_square_format(self, squareToOpen):
         return ("open_square", squareToOpen)
 
+    def open_squares_format(self, squaresToOpen):
+        return ("open_squares", squaresToOpen)
+
     def submit_final_answer_format(self, listOfBombs):
         return ("final_answer", listOfBombs)
 
@@ -66,137 +107,192 @@ class AI2:
             row, col = to_open
             return row, col
 
-        # umm... we have no idea just choose random one I guess
-        print("We have to guess")
+        # umm... we have no idea, open the square least likely to be a bomb
+        log.debug("We have to guess")
+
+        to_open = self.safest_guess()
+        if to_open is not None:
+            return to_open
+
+        # couldn't count the frontier exactly, fall back to a random one I guess
 
         if self.dirty_tiles:
             return random.choice(list(self.dirty_tiles))
 
-        unopened_squares = []
-        for row in range(self.num_rows):
-            for col in range(self.num_cols):
-                if (row,col) not in self.opened and (row,col) not in self.known_bombs:
-                    unopened_squares.append((row, col))
-        return random.choice(unopened_squares)
-
-    # Use recursive backtracking to solve SAT.
-    def backtrack(self, circuit, variables, assigns):
-        steps = 1
-        circuit = simplify(circuit)
-        if circuit.eq(BoolVal(True)):
-            return 'sat', steps # found satisfying solution! :)
-        elif circuit.eq(BoolVal(False)): # this backtracking branch is dead
-            return 'unsat', steps
-        if len(assigns) == len(variables):
-            assert False # reached end of backtracking tree (all free variables assigned), yet neither True nor False?
-
-        try_var = variables[len(assigns)]
-
-        # try true
-        assigns_t = assigns + [(try_var, BoolVal(True))]
-        result_t, steps_t = self.backtrack(substitute(circuit, *assigns_t), variables, assigns_t)
-        steps += steps_t
-        if result_t == 'sat':
-            return 'sat', steps
-
-        # try false
-        assigns_f = assigns + [(try_var, BoolVal(False))]
-        result_f, steps_f = self.backtrack(substitute(circuit, *assigns_f), variables, assigns_f)
-        steps += steps_f
-        if result_f == 'sat':
-            return 'sat', steps
-
-        if result_t == 'unsat' and result_f == 'unsat': # both possibilities unsat? whole thing is unsat
-            return 'unsat', steps
-
-        assert False # ???
-
-    # Solve a boolean circuit satisfiability problem using a recursive backtracker.
-    def sat_solve(self, clauses):
-        clauses = [simplify(clause) for clause in clauses]
-        variables = {}
-        def get_vars(expr):
-            if is_const(expr):
-                if expr.decl().kind() == Z3_OP_UNINTERPRETED and str(expr) not in variables:
-                    variables[str(expr)] = expr
-            else:
-                for c in expr.children():
-                    get_vars(c)
-        for clause in clauses:
-            get_vars(clause)
+        row, col = random.choice(np.argwhere(self.unknown))
+        return int(row), int(col)
+
+    # The unopened square least likely to be a bomb, or None if the probabilities can't be computed exactly.
+    def safest_guess(self):
+        constraints = self.frontier.constraints()
+        return self.probability.safest_cell(constraints, self.unknown, self.num_bombs - len(self.known_bombs))
 
-        is_sat, steps = self.backtrack(And(*clauses), list(variables.values()), [])
+    # Check the backend under assumptions, keeping the SAT statistics.
+    def sat_check(self, backend, assumptions=()):
+        steps_before = backend.steps
+        is_sat = backend.check(assumptions)
+        steps = backend.steps - steps_before
+        num_vars = backend.query[0]
         self.total_sat_solve_steps += steps
-        self.total_sat_variables += len(variables)
+        self.total_sat_variables += num_vars
         self.total_sat_solves += 1
-        print('SAT solve with %d variables took %d steps' % (len(variables), steps))
+        self.metrics.record_query(*backend.query)
+        log.debug('SAT solve with %d variables took %d steps', num_vars, steps)
         return is_sat
 
-    def linear_programming_to_sat(self, lp_problem):
-        tactic = Then(With('simplify', arith_lhs=True, som=True),
-                 'normalize-bounds',  # bounded arithmetic -- we are doing 0-1 integer programming
-                 'lia2pb',  # linear integer arithmetic to pseudo-boolean
-                 'pb2bv',  # pseudo-boolean to bit-vectors
-                 'simplify','propagate-values','solve-eqs','symmetry-reduce','macro-finder','special-relations', 'reduce-bv-size', 'max-bv-sharing','propagate-bv-bounds-new','bv_bound_chk', # throw a bunch of simplification steps on it
-                 'bv1-blast', # bit-vectors to SAT
-                 'simplify', 'propagate-values', 'solve-eqs','symmetry-reduce','macro-finder','special-relations', 'aig' # throw some more simplification on it
-        )
-        boolean_circuit = tactic(lp_problem)
-        assert len(boolean_circuit) == 1
-        clauses = boolean_circuit[0]
-        return clauses
-
-    def recompute(self, board_state):
+    # (persistent mode): fix a cell as a bomb (value == 1) or not (value == 0), once
+    def assert_value(self, r, c, value):
+        if (r, c) not in self.asserted_value:
+            self.asserted_value.add((r, c))
+            self.solver.fix((r, c), value)
+
+    # (persistent mode): add what we learned from opening (r, c)
+    def assert_revealed(self, r, c, value):
+        if value == 9:
+            self.assert_value(r, c, 1)
+            return
+        self.assert_value(r, c, 0)
+        if (r, c) not in self.asserted_number:
+            self.asserted_number.add((r, c))
+            cells = list(self.neighbors(r, c))
+            self.constrained.update(cells)
+            self.solver.add_constraint(cells, int(value))
+
+    # (persistent mode): probe the dirty tiles against the game-long backend
+    def recompute_persistent(self):
         cur_dirty = set(self.dirty_tiles)
         self.dirty_tiles.clear()
+        sat_solves_before = self.total_sat_solves
 
-        s = Goal()
-        candidates = set()
-        for r in range(self.num_rows):
-            for c in range(self.num_cols):
-                if 0 <= board_state[r][c] <= 8:
-                    any_unknown_neighbor = any([board_state[n_r][n_c] == -1 and (n_r, n_c) not in self.known_bombs and (n_r,n_c) in cur_dirty for n_r, n_c in self.neighbors(r, c)])
-                    if any_unknown_neighbor:
-                        expr = 0
-                        for n_r, n_c in self.neighbors(r, c):
-                            expr += self.vars[(n_r, n_c)]
-                            if (n_r, n_c) in self.known_bombs or board_state[n_r][n_c] == 9:
-                                s.add(self.vars[(n_r,n_c)] == 1)
-                            elif 0 <= board_state[n_r][n_c] <= 8:
-                                s.add(self.vars[(n_r,n_c)] == 0)
-                            else:
-                                # this cell is still unknown
-                                candidates.add((n_r,n_c))
-                                s.add(Or(self.vars[(n_r, n_c)] == 0, self.vars[(n_r, n_c)] == 1))
-                        s.add(expr == int(board_state[r][c]))
-
-        assert self.sat_solve(self.linear_programming_to_sat(s)) == 'sat'
+        # cheap deductions first, the solver only probes what they leave undecided
+        constraints = self.frontier.constraints(cur_dirty)
+        frontier_size = len(frozenset().union(*[cells for cells, remaining in constraints]))
+        self.presolve(constraints)
 
-        for r, c in candidates:
-            if (r, c) in self.opened or (r, c) in self.known_bombs: # don't needlessly repeat work
+        candidates = [(r, c) for r, c in cur_dirty
+                      if (r, c) not in self.opened and (r, c) not in self.known_bombs # don't needlessly repeat work
+                      and (r, c) in self.constrained] # no numbered neighbor constrains the others
+
+        seen = {0: set(), 1: set()} # value -> candidates some model gave that value
+        is_sat = self.sat_check(self.solver)
+        assert is_sat == 'sat'
+        self.record_model(self.solver, candidates, seen)
+
+        self.cells_resolved['sat'] += self.probe_candidates(self.solver, candidates, seen)
+        self.metrics.record_recompute(self.total_sat_solves - sat_solves_before, frontier_size)
+
+    def recompute(self):
+        cur_dirty = set(self.dirty_tiles)
+        self.dirty_tiles.clear()
+        sat_solves_before = self.total_sat_solves
+
+        # cheap deductions first, the solver only sees what they leave undecided
+        constraints = self.frontier.constraints(cur_dirty)
+        frontier_size = len(frozenset().union(*[cells for cells, remaining in constraints]))
+        constraints = self.presolve(constraints)
+
+        # a component with a decided cell never comes back, so its entry would only take up space
+        self.component_cache = {key: probed for key, probed in self.component_cache.items()
+                                if not any(cell in self.opened or cell in self.known_bombs for cells, remaining in key for cell in cells)}
+
+        # independent regions of the frontier are solved one at a time instead of as one big formula
+        for component in minesweeperFrontier.split_components(constraints):
+            probed = self.component_cache.get(component.key, set())
+            candidates = [(r, c) for r, c in component.cells
+                          if (r, c) in cur_dirty # we have no new info about the others
+                          and (r, c) not in self.opened and (r, c) not in self.known_bombs # don't needlessly repeat work
+                          and (r, c) not in probed] # already undecided on exactly these constraints
+            if not candidates:
+                self.total_component_cache_hits += 1
                 continue
 
-            if (r, c) not in cur_dirty: # we have no new info about this
+            num_decided = self.solve_component(component, candidates)
+            self.cells_resolved['sat'] += num_decided
+
+            # nothing changed, so the same constraints will leave these candidates undecided next time too
+            if num_decided == 0:
+                self.component_cache[component.key] = probed | set(candidates)
+
+        self.metrics.record_recompute(self.total_sat_solves - sat_solves_before, frontier_size)
+
+    # Run the counting and subset stages, mark what they decide and return the constraints still undecided.
+    def presolve(self, constraints):
+        safe, bombs, resolved = minesweeperDeduction.deduce(constraints)
+        for stage, count in resolved.items():
+            self.cells_resolved[stage] += count
+        for r, c in sorted(safe):
+            self.mark_safe(r, c)
+        for r, c in sorted(bombs):
+            self.mark_bomb(r, c)
+        return minesweeperDeduction.reduce_constraints(constraints, safe, bombs)
+
+    def mark_safe(self, r, c):
+        log.debug('%d,%d is safe', r, c)
+        if self.persistent:
+            self.assert_value(r, c, 0)
+        self.opened.add((r,c))
+        self.queue.append((r,c))
+
+    def mark_bomb(self, r, c):
+        log.debug('%d,%d is bomb', r, c)
+        if self.persistent:
+            self.assert_value(r, c, 1)
+        self.known_bombs.add((r, c))
+        self.unknown[r, c] = False
+        self.frontier.add_bomb((r, c))
+        self.make_neighbors_dirty(r, c)
+
+    # Remember which value every candidate had in the backend's last model, and steer the next check towards
+    # flipping candidates that have only been seen with one value.
+    def record_model(self, backend, candidates, seen):
+        if not self.prune_with_models:
+            return
+        for cell in candidates:
+            value = backend.value(cell)
+            if value is None: # this backend keeps no model
+                return
+            seen[value].add(cell)
+            if cell not in seen[1 - value]:
+                backend.prefer(cell, 1 - value)
+
+    # Probe candidates against the backend, skipping any value some model already showed possible.
+    def probe_candidates(self, backend, candidates, seen):
+        num_decided = 0
+        for r, c in candidates:
+            if (r, c) in self.opened or (r, c) in self.known_bombs: # decided since the list was made
                 continue
 
-            # is it possible for bomb to be here?
-            s_ = s.__copy__()
-            s_.add(self.vars[r, c] == 1)
-            if self.sat_solve(self.linear_programming_to_sat(s_)) == 'unsat': # no, bomb is definitely NOT possible here! so this tile is safe
-                print (f'{r},{c} is safe')
-                s.add(self.vars[r, c] == 0)
-                self.opened.add((r,c))
-                self.queue.append((r,c))
-            else:
-                # is it possible for bomb to NOT be here?
-                s_ = s.__copy__()
-                s_.add(self.vars[r, c] == 0)
-                if self.sat_solve(self.linear_programming_to_sat(s_)) == 'unsat': # no, bomb is DEFINITELY here! so this is bomb tile
-                    print (f'{r},{c} is bomb')
-                    self.known_bombs.add((r, c))
-                    self.make_neighbors_dirty(r, c)
-                    s.add(self.vars[r, c] == 1)
+            for value in (1, 0):
+                if (r, c) in seen[value]: # a model already had this value here, no need to ask
+                    self.total_sat_probes_skipped += 1
+                    continue
+
+                # is it possible for this value to be here?
+                if self.sat_check(backend, [((r, c), value)]) == 'sat':
+                    self.record_model(backend, candidates, seen)
+                    continue
+
+                if value == 1: # no, bomb is definitely NOT possible here! so this tile is safe
+                    self.mark_safe(r, c)
+                else: # no, bomb is DEFINITELY here! so this is bomb tile
+                    self.mark_bomb(r, c)
+                if not self.persistent:
+                    backend.fix((r, c), 1 - value)
+                num_decided += 1
+                break
+        return num_decided
+
+    def solve_component(self, component, candidates):
+        backend = self.backend(self.metrics)
+        for cells, remaining in component.constraints:
+            backend.add_constraint(sorted(cells), remaining)
 
+        seen = {0: set(), 1: set()} # value -> candidates some model gave that value
+        is_sat = self.sat_check(backend)
+        assert is_sat == 'sat'
+        self.record_model(backend, candidates, seen)
+
+        return self.probe_candidates(backend, candidates, seen)
 
     def make_neighbors_dirty(self, opened_row, opened_col):
         if (opened_row, opened_col) in self.dirty_tiles:
@@ -206,28 +302,53 @@ class AI2:
                 self.dirty_tiles.add((n_r, n_c))
 
     def performAI(self, board_state):
-        opened_row, opened_col = self.prev_move
-        self.board_state = board_state
-        if board_state[opened_row][opened_col] == 9:
-            print('We opened a bomb! :(')
-            self.known_bombs.add((opened_row, opened_col))
-        elif board_state[opened_row][opened_col] == 0: # Optimization: open all neighbors of 0
-            for r, c in self.neighbors(opened_row, opened_col):
-                if (r,c) not in self.opened:
-                    self.opened.add((r,c))
-                    self.queue.append((r, c))
-        self.make_neighbors_dirty(opened_row, opened_col)
+        row, col = self.prev_move
+        return self.performAIDelta([(self.prev_move, board_state[row][col])], many=False)
+
+    # revealed is a list of ((row, col), value) of the squares opened since the last move. With many, every
+    # square known to be safe is handed back at once in an open_squares command
+    def performAIDelta(self, revealed, many=True):
+        for (row, col), value in revealed:
+            self.board_state[row][col] = int(value)
+            self.opened.add((row, col))
+            self.unknown[row, col] = False
+        if len(revealed) > 1: # a region was revealed, don't open its squares again
+            self.queue = deque((r, c) for r, c in self.queue if self.board_state[r][c] == -1)
+
+        for (opened_row, opened_col), value in revealed:
+            if value == 9:
+                log.debug('We opened a bomb! :(')
+                self.known_bombs.add((opened_row, opened_col))
+            self.frontier.reveal((opened_row, opened_col), value)
+            if value == 0: # Optimization: open all neighbors of 0
+                for r, c in self.neighbors(opened_row, opened_col):
+                    if (r,c) not in self.opened:
+                        self.opened.add((r,c))
+                        self.queue.append((r, c))
+            self.make_neighbors_dirty(opened_row, opened_col)
+
+            if self.persistent:
+                self.assert_revealed(opened_row, opened_col, value)
 
         if not self.queue:
-            self.recompute(board_state)
+            if self.persistent:
+                self.recompute_persistent()
+            else:
+                self.recompute()
 
         if len(self.known_bombs) == self.num_bombs:
-            print(f"List of bombs is {self.known_bombs}")
+            log.debug("List of bombs is %s", self.known_bombs)
             return self.submit_final_answer_format(list(self.known_bombs))
 
+        if many and len(self.queue) > 1:
+            to_open = list(self.queue)
+            self.queue.clear()
+            log.debug("Squares to open are %s", to_open)
+            return self.open_squares_format(to_open)
+
         to_open = self.choose_square()
         self.prev_move = to_open
         self.opened.add(to_open)
-        print(f"Square to open is {to_open}")
+        log.debug("Square to open is %s", to_open)
 
         return self.open_square_format(to_open)
@@ -0,0 +1,416 @@
+import minesweeperEncoding
+import minesweeperFrontier
+import minesweeperProbability
+import minesweeperSAT
+
+# Solver backends for AI2. A backend is one growing formula over frontier cells (0 = safe, 1 = bomb):
+#   add_constraint(cells, k)  exactly k of cells are bombs
+#   fix(cell, value)          cell is decided, for every later check
+#   check(assumptions)        'sat' or 'unsat' under a list of (cell, value) assumptions, which are not kept
+#   value(cell)               the cell's value in the model of the last 'sat' check, None if the backend keeps no model
+#   prefer(cell, value)       hint to try value first for cell, for backends that branch on a saved phase
+# A backend counts its own search steps (self.steps) and the size of the formula behind its last check
+# (self.query = (variables, clauses)). Encoding and search time go into the AI's metrics.
+
+# imported by the first backend that needs it, so games that never touch z3 don't pay for importing it
+z3 = None
+
+def import_z3():
+    global z3
+    import z3
+
+class SolverBackend:
+
+    name = None
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.steps = 0
+        self.query = (0, 0)
+
+    def add_constraint(self, cells, k):
+        raise NotImplementedError
+
+    def fix(self, cell, value):
+        self.add_constraint([cell], value)
+
+    def check(self, assumptions=()):
+        raise NotImplementedError
+
+    def value(self, cell):
+        return None
+
+    def prefer(self, cell, value):
+        pass
+
+# Direct CNF encoding (minesweeperEncoding) solved by the native CDCL solver, incrementally.
+class CDCLBackend(SolverBackend):
+
+    name = 'cdcl'
+
+    def __init__(self, metrics):
+        super().__init__(metrics)
+        self.cnf = minesweeperEncoding.CNF()
+        self.solver = minesweeperSAT.CDCLSolver()
+        self.num_added = 0 # clauses of self.cnf already in self.solver
+
+    def add_constraint(self, cells, k):
+        with self.metrics.timing('encode'):
+            self.cnf.exactly([self.cnf.variable(cell) for cell in cells], k)
+            for clause in self.cnf.clauses[self.num_added:]:
+                self.solver.add_clause(clause)
+            self.num_added = len(self.cnf.clauses)
+
+    def literal(self, cell, value):
+        var = self.cnf.variable(cell)
+        return var if value == 1 else -var
+
+    def check(self, assumptions=()):
+        lits = [self.literal(cell, value) for cell, value in assumptions]
+        steps_before = self.solver.decisions + self.solver.conflicts
+        with self.metrics.timing('search'):
+            result = self.solver.solve(lits)
+        self.steps += 1 + self.solver.decisions + self.solver.conflicts - steps_before
+        self.query = (self.solver.num_vars, len(self.solver.clauses))
+        return result
+
+    def value(self, cell):
+        return 1 if self.solver.model[self.cnf.variable(cell)] == 1 else 0
+
+    def prefer(self, cell, value):
+        self.solver.phase[self.cnf.variable(cell)] = 1 if value == 1 else -1
+
+# 0-1 Int arithmetic, bit-blasted by a z3 tactic chain and solved by the recursive-style backtracker.
+class BacktrackerBackend(SolverBackend):
+
+    name = 'backtracker'
+
+    def __init__(self, metrics):
+        super().__init__(metrics)
+        import_z3()
+        self.goal = z3.Goal()
+        self.vars = {}
+
+    def var(self, cell):
+        if cell not in self.vars:
+            self.vars[cell] = z3.Int('x_%d_%d' % cell)
+            self.goal.add(z3.Or(self.vars[cell] == 0, self.vars[cell] == 1))
+        return self.vars[cell]
+
+    def add_constraint(self, cells, k):
+        with self.metrics.timing('encode'):
+            self.goal.add(z3.Sum([self.var(cell) for cell in cells]) == k)
+
+    def check(self, assumptions=()):
+        goal = self.goal.__copy__()
+        for cell, value in assumptions:
+            goal.add(self.var(cell) == value)
+        return self.sat_solve(self.linear_programming_to_sat(goal))
+
+    def linear_programming_to_sat(self, lp_problem):
+        tactic = z3.Then(z3.With('simplify', arith_lhs=True, som=True),
+                 'propagate-values',  # fold unit constraints first, pb2bv rejects conflicting bounds on one variable
+                 'normalize-bounds',  # bounded arithmetic -- we are doing 0-1 integer programming
+                 'lia2pb',  # linear integer arithmetic to pseudo-boolean
+                 'pb2bv',  # pseudo-boolean to bit-vectors
+                 'simplify','propagate-values','solve-eqs','symmetry-reduce','macro-finder','special-relations', 'reduce-bv-size', 'max-bv-sharing','propagate-bv-bounds-new','bv_bound_chk', # throw a bunch of simplification steps on it
+                 'bv1-blast', # bit-vectors to SAT
+                 'simplify', 'propagate-values', 'solve-eqs','symmetry-reduce','macro-finder','special-relations', 'aig' # throw some more simplification on it
+        )
+        with self.metrics.timing('encode'):
+            boolean_circuit = tactic(lp_problem)
+        assert len(boolean_circuit) == 1
+        clauses = boolean_circuit[0]
+        return clauses
+
+    # Use backtracking to solve SAT. Branches wait on an explicit stack as (circuit, assigns), the assignments
+    # not yet substituted into the circuit; true is tried before false.
+    def backtrack(self, circuit, variables, assigns):
+        steps = 0
+        branches = [(circuit, assigns)]
+        while branches:
+            circuit, assigns = branches.pop()
+            steps += 1
+            if assigns:
+                circuit = z3.substitute(circuit, *assigns)
+            circuit = z3.simplify(circuit)
+            if circuit.eq(z3.BoolVal(True)):
+                return 'sat', steps # found satisfying solution! :)
+            elif circuit.eq(z3.BoolVal(False)): # this backtracking branch is dead
+                continue
+            if len(assigns) == len(variables):
+                assert False # reached end of backtracking tree (all free variables assigned), yet neither True nor False?
+
+            try_var = variables[len(assigns)]
+            branches.append((circuit, assigns + [(try_var, z3.BoolVal(False))]))
+            branches.append((circuit, assigns + [(try_var, z3.BoolVal(True))]))
+
+        return 'unsat', steps # every branch is dead, whole thing is unsat
+
+    # Solve a boolean circuit satisfiability problem using the backtracker.
+    def sat_solve(self, clauses):
+        clauses = [z3.simplify(clause) for clause in clauses]
+        variables = {}
+        def get_vars(expr):
+            if z3.is_const(expr):
+                if expr.decl().kind() == z3.Z3_OP_UNINTERPRETED and str(expr) not in variables:
+                    variables[str(expr)] = expr
+            else:
+                for c in expr.children():
+                    get_vars(c)
+        for clause in clauses:
+            get_vars(clause)
+
+        with self.metrics.timing('search'):
+            is_sat, steps = self.backtrack(z3.And(*clauses), list(variables.values()), [])
+        self.steps += steps
+        self.query = (len(variables), len(clauses))
+        return is_sat
+
+# A z3 Solver, probed under assumptions. Subclasses pick how cells and constraints are written.
+class Z3Backend(SolverBackend):
+
+    def __init__(self, metrics):
+        super().__init__(metrics)
+        import_z3()
+        self.solver = z3.Solver()
+        self.vars = {}
+        self.num_constraints = 0
+        self.model = None
+
+    def var(self, cell):
+        raise NotImplementedError
+
+    # the formula "cell is a bomb" (value 1) or "cell is not a bomb" (value 0)
+    def cell_is(self, cell, value):
+        raise NotImplementedError
+
+    def formulas(self, cells, k):
+        raise NotImplementedError
+
+    def add_constraint(self, cells, k):
+        with self.metrics.timing('encode'):
+            for formula in self.formulas(list(cells), k):
+                self.solver.add(formula)
+                self.num_constraints += 1
+
+    def fix(self, cell, value):
+        with self.metrics.timing('encode'):
+            self.solver.add(self.cell_is(cell, value))
+            self.num_constraints += 1
+
+    # z3 bit-blasts inside check(), so for these backends 'search' includes turning the constraints into SAT
+    def check(self, assumptions=()):
+        with self.metrics.timing('search'):
+            result = str(self.solver.check(*[self.cell_is(cell, value) for cell, value in assumptions]))
+        self.model = self.solver.model() if result == 'sat' else None
+        self.query = (len(self.vars), self.num_constraints)
+        return result
+
+    def value(self, cell):
+        return 1 if z3.is_true(self.model.eval(self.cell_is(cell, 1), model_completion=True)) else 0
+
+# one Bool per cell and PbEq constraints, handed straight to the SAT core
+class Z3PBBackend(Z3Backend):
+
+    name = 'z3-pb'
+
+    def var(self, cell):
+        if cell not in self.vars:
+            self.vars[cell] = z3.Bool('b_%d_%d' % cell)
+        return self.vars[cell]
+
+    def cell_is(self, cell, value):
+        return self.var(cell) if value == 1 else z3.Not(self.var(cell))
+
+    def formulas(self, cells, k):
+        return [z3.PbEq([(self.var(cell), 1) for cell in cells], k)]
+
+# one 0-1 Int per cell and linear arithmetic constraints
+class Z3IntBackend(Z3Backend):
+
+    name = 'z3-int'
+
+    def var(self, cell):
+        if cell not in self.vars:
+            self.vars[cell] = z3.Int('x_%d_%d' % cell)
+            self.solver.add(z3.Or(self.vars[cell] == 0, self.vars[cell] == 1))
+            self.num_constraints += 1
+        return self.vars[cell]
+
+    def cell_is(self, cell, value):
+        return self.var(cell) == value
+
+    def formulas(self, cells, k):
+        return [z3.Sum([self.var(cell) for cell in cells]) == k]
+
+# the direct CNF encoding as plain clauses for z3's SAT core
+class Z3SATBackend(Z3Backend):
+
+    name = 'z3-sat'
+
+    def __init__(self, metrics):
+        super().__init__(metrics)
+        self.cnf = minesweeperEncoding.CNF()
+        self.num_added = 0
+        self.bools = [None] # CNF variable -> Bool
+
+    def bool_of(self, lit):
+        while len(self.bools) <= abs(lit):
+            self.bools.append(z3.Bool('v%d' % len(self.bools)))
+        return self.bools[lit] if lit > 0 else z3.Not(self.bools[-lit])
+
+    def var(self, cell):
+        if cell not in self.vars:
+            self.vars[cell] = self.bool_of(self.cnf.variable(cell))
+        return self.vars[cell]
+
+    def cell_is(self, cell, value):
+        return self.var(cell) if value == 1 else z3.Not(self.var(cell))
+
+    # The new clauses go to z3 as one SMT-LIB string. z3 parses it in C, while building every clause with z3.Or
+    # costs more than the search once a persistent game's formula holds tens of thousands of clauses.
+    def add_constraint(self, cells, k):
+        with self.metrics.timing('encode'):
+            self.cnf.exactly([self.cnf.variable(cell) for cell in cells], k)
+            clauses = self.cnf.clauses[self.num_added:]
+            self.num_added = len(self.cnf.clauses)
+            variables = sorted(set(abs(lit) for clause in clauses for lit in clause))
+            self.solver.from_string(''.join('(declare-const v%d Bool)' % var for var in variables) +
+                                    ''.join('(assert (or %s))' % ' '.join('v%d' % lit if lit > 0 else '(not v%d)' % -lit for lit in clause)
+                                            if clause else '(assert false)' for clause in clauses))
+            self.num_constraints += len(clauses)
+
+# Pure Python depth-first enumeration of assignments, no z3 and no encoding. The constraints, less their fixed
+# cells, are split into components (see minesweeperFrontier) and every component is enumerated on its own,
+# cells in minesweeperProbability.cell_order, cutting a branch as soon as some constraint can no longer be
+# met. A check only enumerates the components holding an assumed cell; the others keep their result from an
+# earlier check for as long as their constraints stay the same.
+class EnumeratorBackend(SolverBackend):
+
+    name = 'enumerate'
+
+    def __init__(self, metrics):
+        super().__init__(metrics)
+        self.constraints = [] # (cells, k)
+        self.fixed = {} # cell -> value
+        self.contradicted = False # some cell was fixed to both values
+        self.components = None # Component.key -> (cell order, constraints, touching), rebuilt after a change
+        self.component_of = {} # cell -> key of its component
+        self.results = {} # component key -> (result, model) of the component without assumptions
+        self.model = {}
+
+    def add_constraint(self, cells, k):
+        self.constraints.append((tuple(cells), k))
+        self.components = None
+
+    def fix(self, cell, value):
+        if self.fixed.setdefault(cell, value) != value:
+            self.contradicted = True
+        self.components = None
+
+    # Split the constraints left once fixed cells are taken out into components. Returns False if some
+    # constraint can't be met by the fixed cells alone.
+    def build(self):
+        if self.components is not None:
+            return True
+        with self.metrics.timing('encode'):
+            reduced = []
+            for cells, k in self.constraints:
+                free = frozenset(cell for cell in cells if cell not in self.fixed)
+                k -= sum(self.fixed[cell] for cell in cells if cell in self.fixed)
+                if not free and k != 0:
+                    return False
+                if free:
+                    reduced.append((free, k))
+
+            old = self.components or {}
+            self.components = {}
+            self.component_of = {}
+            for component in minesweeperFrontier.split_components(reduced):
+                if component.key in old: # same constraints as before, nothing to redo
+                    self.components[component.key] = old[component.key]
+                else:
+                    constraints = [(tuple(cells), k) for cells, k in component.constraints]
+                    touching = {cell: [] for cell in component.cells} # cell -> indices of the constraints it is in
+                    for i, (cells, k) in enumerate(constraints):
+                        for cell in cells:
+                            touching[cell].append(i)
+                    self.components[component.key] = (minesweeperProbability.cell_order(component), constraints, touching)
+                for cell in component.cells:
+                    self.component_of[cell] = component.key
+            self.results = {key: result for key, result in self.results.items() if key in self.components}
+        return True
+
+    def check(self, assumptions=()):
+        assumed = {}
+        for cell, value in assumptions:
+            if self.fixed.get(cell, value) != value or assumed.setdefault(cell, value) != value:
+                return 'unsat'
+        if self.contradicted or not self.build():
+            return 'unsat'
+        assumed_components = set(self.component_of[cell] for cell in assumed if cell in self.component_of)
+
+        result = 'sat'
+        with self.metrics.timing('search'):
+            for key, component in self.components.items():
+                if key in assumed_components:
+                    component_result, model = self.enumerate(*component, assumed)
+                else:
+                    if key not in self.results:
+                        self.results[key] = self.enumerate(*component, {})
+                    component_result, model = self.results[key]
+                if component_result == 'unsat':
+                    result = 'unsat'
+                    break
+                self.model.update(model)
+        self.model.update(assumed) # assumed cells no constraint mentions
+        self.query = (len(self.component_of), len(self.constraints))
+        return result
+
+    # Enumerate one component, cells in assumed only taking their assumed value. Returns the result and, if
+    # 'sat', the model of its cells.
+    def enumerate(self, order, constraints, touching, assumed):
+        bombs = [0] * len(constraints) # bombs assigned so far per constraint
+        unassigned = [len(cells) for cells, k in constraints]
+
+        def assign(cell, value, sign):
+            ok = True
+            for i in touching[cell]:
+                bombs[i] += sign * value
+                unassigned[i] -= sign
+                k = constraints[i][1]
+                ok = ok and bombs[i] <= k <= bombs[i] + unassigned[i]
+            return ok
+
+        values = []
+        choices = [self.choices(order[0], assumed)]
+        while len(values) < len(order):
+            depth = len(values)
+            if not choices[depth]:
+                choices.pop()
+                if not values:
+                    return 'unsat', None
+                assign(order[depth - 1], values.pop(), -1)
+                continue
+
+            value = choices[depth].pop()
+            self.steps += 1
+            if assign(order[depth], value, 1):
+                values.append(value)
+                if len(values) < len(order):
+                    choices.append(self.choices(order[len(values)], assumed))
+            else:
+                assign(order[depth], value, -1)
+
+        return 'sat', dict(zip(order, values))
+
+    # values to try for cell, popped from the end: safe first
+    def choices(self, cell, assumed):
+        return [assumed[cell]] if cell in assumed else [1, 0]
+
+    def value(self, cell):
+        return self.fixed.get(cell, self.model.get(cell, 0))
+
+# backend name -> class, what AI2's backend= option and the benchmark's --backend flag choose from
+BACKENDS = {backend.name: backend for backend in (CDCLBackend, BacktrackerBackend, Z3SATBackend, Z3PBBackend, Z3IntBackend, EnumeratorBackend)}
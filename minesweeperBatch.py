@@ -0,0 +1,120 @@
+import numpy as np
+import random
+import time
+from collections import deque
+import minesweeperBoards
+import minesweeperLog
+
+# Many games of one board size played in lockstep. BatchAI takes the stacked (N, rows, cols) board states of
+# N games and returns one command per game per step. The counting rule (the one AI1 and the counting stage of
+# AI2 use) runs as array operations over every game that has run out of safe squares at once. Only a game
+# where counting finds nothing is handed to its own AI (as minesweeperRunner.createAI builds it), with every
+# square revealed since that AI last moved, and plays the command the AI returns. Each game keeps its own
+# random state, seeded from its own seed, so a game plays the same whatever batch it is in. It is not the
+# same player as the AI alone, though: counting opens the squares it finds before the AI sees them, in board
+# order, so digs and guesses can differ from minesweeperRunner.playGame. playBatch is the matching game loop.
+
+log = minesweeperLog.getLogger('batch')
+
+class BatchAI:
+
+    # AIs[k] plays game k, whose guesses are seeded with seeds[k]
+    def __init__(self, AIs, seeds, numRows, numCols, numBombs):
+        numGames = len(AIs)
+        self.AIs = AIs
+        self.num_bombs = numBombs
+        self.rngs = [random.Random(seed) for seed in seeds]  # per game, the AIs draw from the random module
+
+        self.bombs = np.zeros((numGames, numRows, numCols), dtype=bool)  # known bombs
+        self.safe = np.zeros((numGames, numRows, numCols), dtype=bool)  # known safe, opened or not
+        self.shown = np.zeros((numGames, numRows, numCols), dtype=bool)  # opened squares the game's AI was given
+        self.queues = [deque() for i in range(numGames)]  # safe squares to open next, per game
+
+    # One move of every game in games (all of them by default). states[k] is the board state of game games[k],
+    # -1 for unopened squares. Returns the command of every game, in the same order. A game's move time, kept
+    # in its AI's metrics, is its share of the array work plus the time its AI took.
+    def step(self, states, games=None):
+        games = np.arange(len(states)) if games is None else np.asarray(games)
+        start = time.perf_counter()
+        self.bombs[games] |= states == 9  # opened a bomb, the game is lost but still wants a bomb list
+        self.safe[games] |= (states >= 0) & (states <= 8)
+
+        stuck = np.array([not self.queues[i] for i in games], dtype=bool)
+        if stuck.any():
+            self.count_deductions(games[stuck], states[stuck])
+        shared = (time.perf_counter() - start) / len(games)
+
+        commands = []
+        for k, i in enumerate(games):
+            start = time.perf_counter()
+            AI = self.AIs[i]
+            if self.bombs[i].sum() == self.num_bombs:
+                bombs = [(int(r), int(c)) for r, c in np.argwhere(self.bombs[i])]
+                log.debug("game %d: list of bombs is %s", i, bombs)
+                commands.append(AI.submit_final_answer_format(bombs))
+            elif self.queues[i]:
+                to_open = self.queues[i].popleft()
+                log.debug("game %d: square to open is %s", i, to_open)
+                commands.append(AI.open_square_format(to_open))
+            else:
+                commands.append(self.consult(i, states[k]))
+            AI.metrics.record_move(shared + time.perf_counter() - start)
+        return commands
+
+    # Hand game i to its AI: every square opened since it last moved, under the game's own random state.
+    def consult(self, i, state):
+        new = (state >= 0) & ~self.shown[i]
+        self.shown[i] |= new
+        revealed = [((int(r), int(c)), int(state[r, c])) for r, c in np.argwhere(new)]
+        random.setstate(self.rngs[i].getstate())
+        command = self.AIs[i].performAIDelta(revealed)
+        self.rngs[i].setstate(random.getstate())
+        return command
+
+    # Run the counting rule to a fixpoint on the stacked states of games, queueing the safe squares it finds.
+    # A numbered square with all of its bombs known makes its undecided neighbors safe, one with exactly as many
+    # undecided neighbors as bombs left makes them bombs.
+    def count_deductions(self, games, states):
+        bombs = self.bombs[games]
+        safe = self.safe[games]
+        numbered = (states >= 0) & (states <= 8)
+        rows = np.arange(len(games))  # the games still finding something
+        while rows.size:
+            state = states[rows]
+            undecided = ~bombs[rows] & ~safe[rows]
+            left = state - minesweeperBoards.count_neighbors(bombs[rows])
+            around = minesweeperBoards.count_neighbors(undecided)
+            frontier = numbered[rows] & (around > 0)
+            new_safe = (minesweeperBoards.count_neighbors(frontier & (left == 0)) > 0) & undecided
+            new_bombs = (minesweeperBoards.count_neighbors(frontier & (left == around)) > 0) & undecided & ~new_safe
+            safe[rows] |= new_safe
+            bombs[rows] |= new_bombs
+            rows = rows[(new_safe | new_bombs).any(axis=(1, 2))]
+
+        found_safe = safe & ~self.safe[games]
+        found_bombs = bombs & ~self.bombs[games]
+        for k, count in enumerate(found_safe.sum(axis=(1, 2)) + found_bombs.sum(axis=(1, 2))):
+            AI = self.AIs[games[k]]
+            if hasattr(AI, 'cells_resolved'):
+                AI.cells_resolved['counting'] += int(count)
+        for k, r, c in np.argwhere(found_safe):
+            self.queues[games[k]].append((int(r), int(c)))
+        self.bombs[games] = bombs
+        self.safe[games] = safe
+
+# Play the games set up on engines in lockstep, engines[k] by AIs[k] with its guesses seeded by seeds[k].
+# Each engine's time is the sum of its game's move times.
+def playBatch(engines, AIs, seeds):
+    first = engines[0]
+    batch = BatchAI(AIs, seeds, first.numRows, first.numCols, first.numBombs)
+    games = list(range(len(engines)))
+    while games:
+        for i in games:
+            engines[i].uncoverNext(getattr(AIs[i], 'reveal_regions', False))
+        states = np.stack([engines[i].getBoardState() for i in games])
+        for i, command in zip(games, batch.step(states, games)):
+            engines[i].parseAIAlgo(command)
+        games = [i for i in games if engines[i].outcome == 0]
+
+    for engine, AI in zip(engines, AIs):
+        engine.time = sum(AI.metrics.move_times)
@@ -0,0 +1,73 @@
+import numpy as np
+
+# Vectorized board generation. A board is an int8 array holding 0-8 for numbered squares and 9 for bombs.
+# rng is a numpy.random.Generator, so a board is fully determined by the generator's seed.
+
+# flat indices of the squares allowed to hold a bomb (everything but the 3x3 around the safe square)
+def allowed_indices(numRows, numCols, safeSquare):
+    allowed = np.ones((numRows, numCols), dtype=bool)
+    r, c = safeSquare
+    allowed[max(r - 1, 0):r + 2, max(c - 1, 0):c + 2] = False
+    return np.flatnonzero(allowed)
+
+# number of bombs around every square, for one bombs mask (rows, cols) or a stack of them (..., rows, cols)
+def count_neighbors(bombs):
+    bombs = bombs.astype(np.int8)
+    # the 3x3 box sum, as the sum over each square and the squares above and below it, then over that and the
+    # columns left and right of it, minus the square itself
+    columns = bombs.copy()
+    columns[..., 1:, :] += bombs[..., :-1, :]
+    columns[..., :-1, :] += bombs[..., 1:, :]
+    counts = columns.copy()
+    counts[..., :, 1:] += columns[..., :, :-1]
+    counts[..., :, :-1] += columns[..., :, 1:]
+    return counts - bombs
+
+# the answer grid for a bombs mask
+def board_from_bombs(bombs):
+    return np.where(bombs, np.int8(9), count_neighbors(bombs))
+
+# a random board with numBombs bombs, none of them in the 3x3 around safeSquare
+def generate_board(rng, numRows, numCols, numBombs, safeSquare):
+    allowed = allowed_indices(numRows, numCols, safeSquare)
+    if numBombs > len(allowed):
+        raise ValueError(f"can't place {numBombs} bombs on a {numRows}x{numCols} board with a safe 3x3")
+    bombs = np.zeros(numRows * numCols, dtype=bool)
+    bombs[rng.choice(allowed, size=numBombs, replace=False)] = True
+    return board_from_bombs(bombs.reshape(numRows, numCols))
+
+# numBoards random boards as one (numBoards, numRows, numCols) array
+def generate_boards(rng, numBoards, numRows, numCols, numBombs, safeSquare):
+    allowed = allowed_indices(numRows, numCols, safeSquare)
+    if numBombs > len(allowed):
+        raise ValueError(f"can't place {numBombs} bombs on a {numRows}x{numCols} board with a safe 3x3")
+    # the numBombs smallest of a row of uniform keys are a uniform sample without replacement
+    keys = rng.random((numBoards, len(allowed)))
+    chosen = allowed[np.argpartition(keys, numBombs - 1, axis=1)[:, :numBombs]] if numBombs else np.empty((numBoards, 0), dtype=int)
+    bombs = np.zeros((numBoards, numRows * numCols), dtype=bool)
+    np.put_along_axis(bombs, chosen, True, axis=1)
+    return board_from_bombs(bombs.reshape(numBoards, numRows, numCols))
+
+# decode a board string ("dim" rows x "dim" cols digits, column-major: square (r, c) is digit c*numRows + r) into
+# an answer grid, without a per-character loop.
+# Raises ValueError if the string has the wrong length or characters, or its numbers don't match its bombs
+def decode_board(board, numRows, numCols):
+    if isinstance(board, str):
+        grid = np.frombuffer(board.encode(), dtype=np.uint8) - 48
+    else:
+        grid = np.asarray(board, dtype=np.int64).astype(np.uint8)
+    if grid.size != numRows * numCols:
+        raise ValueError(f"board has {grid.size} squares, expected {numRows}x{numCols}")
+    if grid.size and grid.max() > 9:  # anything but a digit wraps around past 9
+        raise ValueError("board may only hold the digits 0-9")
+
+    grid = np.ascontiguousarray(grid.reshape(numCols, numRows).T).view(np.int8)
+    wrong = np.argwhere(grid != board_from_bombs(grid == 9))
+    if len(wrong):
+        r, c = wrong[0]
+        raise ValueError(f"{len(wrong)} squares don't match the bombs around them, first at ({r}, {c}): {grid[r, c]}")
+    return grid
+
+# the positions of the bombs on a board, as (row, col) tuples
+def bomb_locations(board):
+    return [(int(r), int(c)) for r, c in np.argwhere(board == 9)]
@@ -0,0 +1,206 @@
+import numpy as np
+import argparse
+import json
+import os
+import minesweeperBoards
+
+# Binary board corpus. One file holds any number of boards of the same size and bomb count:
+#   a 32 byte header (HEADER_DTYPE), then one fixed-width record per board: the safe square as two
+#   uint16 and the answer grid as rows*cols uint8 (0-8 numbers, 9 bombs), row-major.
+# The records are opened with np.memmap, so a run can stream through 100k boards with one file open.
+
+MAGIC = b'MSWPCRP1'
+VERSION = 1
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('version', '<u4'), ('numRows', '<u4'), ('numCols', '<u4'),
+                         ('numBombs', '<u4'), ('numBoards', '<u8')])
+
+# the sweep sets in varied_density/ and varied_size/: (rows, cols, bomb density in %), 5 boards each. The
+# committed JSON test cases are the benchmark data; each entry's .msc corpus is packed from them (pack_sweeps)
+DENSITY_SWEEP = [(20, 20, density) for density in range(2, 22, 2)]
+SIZE_SWEEP = [(10, 10, 10), (20, 10, 10), (20, 15, 10), (20, 20, 10), (25, 20, 10), (30, 20, 10),
+              (30, 30, 10), (32, 25, 10), (35, 20, 10), (40, 25, 10)]
+SWEEP_BOARDS = 5
+
+def record_dtype(numRows, numCols):
+    return np.dtype([('safe', '<u2', (2,)), ('board', 'u1', (numRows, numCols))])
+
+class Corpus:
+
+    def __init__(self, filename, mode='r'):
+        header = np.fromfile(filename, dtype=HEADER_DTYPE, count=1)
+        if len(header) != 1 or header['magic'][0] != MAGIC:
+            raise ValueError(f"{filename} is not a board corpus")
+        if header['version'][0] != VERSION:
+            raise ValueError(f"{filename} has corpus version {header['version'][0]}, expected {VERSION}")
+
+        self.filename = filename
+        self.numRows = int(header['numRows'][0])
+        self.numCols = int(header['numCols'][0])
+        self.numBombs = int(header['numBombs'][0])
+        self.numBoards = int(header['numBoards'][0])
+        self.records = np.memmap(filename, dtype=record_dtype(self.numRows, self.numCols), mode=mode,
+                                 offset=HEADER_DTYPE.itemsize, shape=(self.numBoards,))
+
+    # create an empty corpus file of numBoards boards and open it for writing
+    @classmethod
+    def create(cls, filename, numBoards, numRows, numCols, numBombs):
+        header = np.array([(MAGIC, VERSION, numRows, numCols, numBombs, numBoards)], dtype=HEADER_DTYPE)
+        with open(filename, 'wb') as fp:
+            header.tofile(fp)
+            fp.truncate(HEADER_DTYPE.itemsize + numBoards * record_dtype(numRows, numCols).itemsize)
+        return cls(filename, mode='r+')
+
+    def __len__(self):
+        return self.numBoards
+
+    # (board, safe square) of board i. The board is a view into the mapped file
+    def __getitem__(self, i):
+        record = self.records[i]
+        return record['board'], (int(record['safe'][0]), int(record['safe'][1]))
+
+    def __iter__(self):
+        for i in range(self.numBoards):
+            yield self[i]
+
+    @property
+    def boards(self):
+        return self.records['board']
+
+    @property
+    def safeSquares(self):
+        return self.records['safe']
+
+    def flush(self):
+        self.records.flush()
+
+# write a (numBoards, rows, cols) stack of boards and their safe squares to a new corpus file
+def write_corpus(filename, boards, safeSquares, numBombs):
+    boards = np.asarray(boards)
+    corpus = Corpus.create(filename, *boards.shape, numBombs)
+    corpus.boards[:] = boards
+    corpus.safeSquares[:] = safeSquares
+    corpus.flush()
+    return corpus
+
+# fill a new corpus with numBoards random boards, generated in chunks so the corpus never has to fit in memory
+def generate_corpus(filename, rng, numBoards, numRows, numCols, numBombs, safeSquare, chunk=1024):
+    corpus = Corpus.create(filename, numBoards, numRows, numCols, numBombs)
+    corpus.safeSquares[:] = safeSquare
+    for start in range(0, numBoards, chunk):
+        stop = min(start + chunk, numBoards)
+        corpus.boards[start:stop] = minesweeperBoards.generate_boards(rng, stop - start, numRows, numCols, numBombs, safeSquare)
+    corpus.flush()
+    return corpus
+
+# read a test case file in the JSON layout ({"dim", "bombs", "safe", "board"}), returns (board, safe square, bombs)
+def read_json(filename):
+    with open(filename) as fp:
+        data = json.load(fp)
+    numRows, numCols = (int(x) for x in data['dim'].split(','))
+    safe = tuple(int(x) for x in data['safe'].split(','))
+    board = minesweeperBoards.decode_board(data['board'], numRows, numCols).view(np.uint8)
+    return board, safe, int(data['bombs'])
+
+# write one board as a test case file in the JSON layout (the board string is column-major, see decode_board)
+def write_json(filename, board, safeSquare, numBombs):
+    data = {
+        'dim': f'{board.shape[0]},{board.shape[1]}',
+        'bombs': str(numBombs),
+        'safe': f'{safeSquare[0]},{safeSquare[1]}',
+        'board': ''.join(map(str, np.asarray(board).ravel(order='F'))),
+    }
+    with open(filename, 'w') as fp:
+        json.dump(data, fp)
+
+# pack JSON test cases (all the same size and bomb count) into one corpus
+def pack(filename, jsonFilenames):
+    cases = [read_json(name) for name in jsonFilenames]
+    if len(set((board.shape, bombs) for board, safe, bombs in cases)) > 1:
+        raise ValueError("a corpus holds boards of one size and bomb count only")
+    boards = np.stack([board for board, safe, bombs in cases])
+    return write_corpus(filename, boards, [safe for board, safe, bombs in cases], cases[0][2])
+
+# unpack a corpus into JSON test cases <prefix>_<i>.json
+def unpack(filename, prefix):
+    corpus = Corpus(filename)
+    names = []
+    for i, (board, safe) in enumerate(corpus):
+        names.append(f'{prefix}_{i}.json')
+        write_json(names[-1], board, safe, corpus.numBombs)
+    return names
+
+# the file name prefix the sweep sets use, e.g. 20x_20y_04d
+def sweep_prefix(numRows, numCols, density):
+    return f'{numRows}x_{numCols}y_{density:02d}d'
+
+# the directory holding the committed sweep sets
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# pack the JSON test cases of every sweep entry under root into its corpus, e.g. varied_density/20x_20y_04d.msc
+def pack_sweeps(root):
+    for directory, sweep in (('varied_density', DENSITY_SWEEP), ('varied_size', SIZE_SWEEP)):
+        for numRows, numCols, density in sweep:
+            prefix = os.path.join(root, directory, sweep_prefix(numRows, numCols, density))
+            pack(prefix + '.msc', [f'{prefix}_{i}.json' for i in range(SWEEP_BOARDS)])
+
+# generate new random sweep sets (JSON test cases plus one corpus per entry) under root. Never over the committed
+# sets: results on new boards can't be compared with results on those
+def regenerate_sweeps(root, seed):
+    if os.path.realpath(root) == os.path.realpath(REPO_ROOT):
+        raise ValueError("won't overwrite the committed sweep sets, regenerate into another directory")
+    rng = np.random.default_rng(seed)
+    for directory, sweep in (('varied_density', DENSITY_SWEEP), ('varied_size', SIZE_SWEEP)):
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+        for numRows, numCols, density in sweep:
+            numBombs = round(numRows * numCols * density / 100)
+            safeSquare = (numRows // 2, numCols // 2)
+            prefix = os.path.join(root, directory, sweep_prefix(numRows, numCols, density))
+            boards = minesweeperBoards.generate_boards(rng, SWEEP_BOARDS, numRows, numCols, numBombs, safeSquare)
+            write_corpus(prefix + '.msc', boards, safeSquare, numBombs)
+            unpack(prefix + '.msc', prefix)
+
+def main():
+    parser = argparse.ArgumentParser(description='build, convert and regenerate binary board corpora (.msc)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('generate', help='fill a corpus with random boards')
+    command.add_argument('corpus')
+    for name in ('x_dim', 'y_dim', 'num_bombs', 'safe_x', 'safe_y', 'num_boards'):
+        command.add_argument(name, type=int)
+    command.add_argument('--seed', default=None, type=int)
+
+    command = commands.add_parser('pack', help='pack JSON test cases into a corpus')
+    command.add_argument('corpus')
+    command.add_argument('json_files', nargs='+')
+
+    command = commands.add_parser('unpack', help='unpack a corpus into JSON test cases <prefix>_<i>.json')
+    command.add_argument('corpus')
+    command.add_argument('prefix')
+
+    command = commands.add_parser('pack-sweeps', help='pack the varied_density and varied_size JSON test cases into their corpora')
+    command.add_argument('--root', default=REPO_ROOT)
+
+    command = commands.add_parser('regenerate', help='generate new random varied_density and varied_size sets in another directory')
+    command.add_argument('root')
+    command.add_argument('--seed', default=3510, type=int)
+
+    args = parser.parse_args()
+    if args.command == 'generate':
+        corpus = generate_corpus(args.corpus, np.random.default_rng(args.seed), args.num_boards, args.x_dim, args.y_dim,
+                                 args.num_bombs, (args.safe_x, args.safe_y))
+        print(f'wrote {len(corpus)} boards to {args.corpus}')
+    elif args.command == 'pack':
+        corpus = pack(args.corpus, args.json_files)
+        print(f'wrote {len(corpus)} boards to {args.corpus}')
+    elif args.command == 'unpack':
+        print(f'wrote {len(unpack(args.corpus, args.prefix))} test cases')
+    elif args.command == 'pack-sweeps':
+        pack_sweeps(args.root)
+    elif args.command == 'regenerate':
+        try:
+            regenerate_sweeps(args.root, args.seed)
+        except ValueError as e:
+            parser.error(str(e))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Cheap deductions that run before any SAT call. Constraints are (cells, remaining) pairs as built by
+# minesweeperFrontier.FrontierIndex.constraints. The stages, run to a fixpoint:
+#   counting: a constraint with no bombs left is all safe, one with as many bombs as cells is all bombs
+#             (the same rule AI1.on_cell_update uses)
+#   subset:   for two overlapping constraints A and B, if A needs exactly |A - B| more bombs than B,
+#             every cell of A - B is a bomb and every cell of B - A is safe (this covers A being a subset of B)
+# Whatever is left undecided goes to the solver.
+
+STAGES = ('counting', 'subset', 'sat')
+
+# Drop decided cells from the constraints, and constraints left with no cells.
+def reduce_constraints(constraints, safe, bombs):
+    reduced = []
+    for cells, remaining in constraints:
+        left = frozenset(cell for cell in cells if cell not in safe and cell not in bombs)
+        if left:
+            reduced.append((left, remaining - sum(1 for cell in cells if cell in bombs)))
+    return reduced
+
+def counting_stage(constraints, safe, bombs):
+    found = 0
+    for cells, remaining in constraints:
+        if remaining == 0:
+            new = cells - safe
+            safe |= new
+            found += len(new)
+        elif remaining == len(cells):
+            new = cells - bombs
+            bombs |= new
+            found += len(new)
+    return found
+
+def subset_stage(constraints, safe, bombs):
+    containing = {}
+    for i, (cells, remaining) in enumerate(constraints):
+        for cell in cells:
+            containing.setdefault(cell, []).append(i)
+
+    found = 0
+    for i, (cells_a, remaining_a) in enumerate(constraints):
+        overlapping = set(j for cell in cells_a for j in containing[cell] if j != i)
+        for j in overlapping:
+            cells_b, remaining_b = constraints[j]
+            only_a = cells_a - cells_b
+            if remaining_a - remaining_b == len(only_a):
+                new_bombs = only_a - bombs
+                new_safe = (cells_b - cells_a) - safe
+                bombs |= new_bombs
+                safe |= new_safe
+                found += len(new_bombs) + len(new_safe)
+    return found
+
+# Run the cheap stages to a fixpoint. Returns (safe cells, bomb cells, cells resolved per stage).
+def deduce(constraints):
+    safe, bombs = set(), set()
+    resolved = {'counting': 0, 'subset': 0}
+    while True:
+        reduced = reduce_constraints(constraints, safe, bombs)
+        found = counting_stage(reduced, safe, bombs)
+        if found:
+            resolved['counting'] += found
+            continue
+        found = subset_stage(reduced, safe, bombs)
+        if found:
+            resolved['subset'] += found
+            continue
+        return safe, bombs, resolved
@@ -0,0 +1,76 @@
+# Direct CNF encoding of minesweeper constraints. Every unknown cell is one boolean variable
+# (true = bomb) and "exactly k of these cells are bombs" is written straight as clauses, so a
+# formula goes to SAT without the lia2pb/pb2bv/bit-blast tactic chain.
+# Small constraints (a number has at most 8 unknown neighbors) use the binomial encoding, which
+# needs no auxiliary variables; longer ones use a sequential counter (Sinz 2005).
+# Literals are DIMACS style: variable v is the int v, its negation is -v.
+from itertools import combinations
+
+# longest list of literals that is encoded binomially
+BINOMIAL_MAX_LITS = 8
+
+class CNF:
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+        self.var_of = {}  # key (e.g. a cell) -> variable
+        self.key_of = {}  # variable -> key
+
+    # fresh auxiliary variable
+    def new_var(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    # the variable standing for key, created on first use
+    def variable(self, key):
+        if key not in self.var_of:
+            var = self.new_var()
+            self.var_of[key] = var
+            self.key_of[var] = key
+        return self.var_of[key]
+
+    def add_clause(self, lits):
+        self.clauses.append(list(lits))
+
+    # at most k of lits are true (sequential counter)
+    def at_most(self, lits, k):
+        n = len(lits)
+        if k >= n:
+            return
+        if k < 0:
+            self.add_clause([])
+            return
+        if k == 0:
+            for lit in lits:
+                self.add_clause([-lit])
+            return
+        if n <= BINOMIAL_MAX_LITS:
+            # no k+1 of lits are true together
+            for subset in combinations(lits, k + 1):
+                self.add_clause([-lit for lit in subset])
+            return
+
+        # s[i][j] is true if at least j+1 of lits[0..i] are true
+        s = [[self.new_var() for j in range(k)] for i in range(n - 1)]
+
+        self.add_clause([-lits[0], s[0][0]])
+        for j in range(1, k):
+            self.add_clause([-s[0][j]])
+        for i in range(1, n - 1):
+            self.add_clause([-lits[i], s[i][0]])
+            self.add_clause([-s[i-1][0], s[i][0]])
+            for j in range(1, k):
+                self.add_clause([-lits[i], -s[i-1][j-1], s[i][j]])
+                self.add_clause([-s[i-1][j], s[i][j]])
+            self.add_clause([-lits[i], -s[i-1][k-1]])
+        self.add_clause([-lits[n-1], -s[n-2][k-1]])
+
+    # at least k of lits are true
+    def at_least(self, lits, k):
+        self.at_most([-lit for lit in lits], len(lits) - k)
+
+    # exactly k of lits are true
+    def exactly(self, lits, k):
+        self.at_most(lits, k)
+        self.at_least(lits, k)
@@ -0,0 +1,35 @@
+import argparse
+import minesweeperBackends
+import minesweeperRunner
+
+# Play the same seeded boards once per constraint encoding (or per solver backend) and compare the cost of the SAT work.
+def main():
+    parser = argparse.ArgumentParser(description='compare the int (tactic chain) and bool (direct) encodings of AI2 on the same boards')
+    parser.add_argument('x_dim', type=int)
+    parser.add_argument('y_dim', type=int)
+    parser.add_argument('num_bombs', type=int)
+    parser.add_argument('num_games', type=int)
+    parser.add_argument('--algo', default=2, type=int, choices=[2, 3], help='2 = AI2 on the native backends (default cdcl; int encoding = backtracker), 3 = AI2 on Z3 (z3-pb; int encoding = z3-int); --backends compares named AI2 backends')
+    parser.add_argument('-j', '--workers', default=1, type=int, help='number of worker processes')
+    parser.add_argument('--seed', default=0, type=int, help='master seed, both encodings play the boards derived from it')
+    parser.add_argument('--persistent', action='store_true', help='keep one solver for the whole game instead of one per frontier component')
+    parser.add_argument('--backends', nargs='+', choices=sorted(minesweeperBackends.BACKENDS), help='compare these AI2 backends instead of the two encodings')
+    args = parser.parse_args()
+
+    safeSquare = (args.x_dim // 2, args.y_dim // 2)
+    print(f'numRows={args.x_dim}, numCols={args.y_dim}, numBombs={args.num_bombs}, numGames={args.num_games}, algo={args.algo}, seed={args.seed}, persistent={args.persistent}')
+    if args.backends:
+        runs = [(2, 'backend', backend) for backend in args.backends]
+    else:
+        runs = [(args.algo, 'encoding', encoding) for encoding in ('int', 'bool')]
+    for algo, option, value in runs:
+        results = minesweeperRunner.runGames(args.x_dim, args.y_dim, args.num_bombs, safeSquare, algo, args.num_games,
+                                             workers=args.workers, masterSeed=args.seed, options={option: value, 'persistent': args.persistent})
+        totals = minesweeperRunner.combineResults(results)
+        queries = max(totals['total_sat_solves'], 1)
+        print(f"{option}={value}, totalTime={round(totals['totalTime'], 3)}, averageTime={round(totals['totalTime']/args.num_games, 3)}, "
+              f"SAT queries={totals['total_sat_solves']}, timePerQuery={round(1000*totals['totalTime']/queries, 3)}ms, "
+              f"averageDigs={totals['totalDigs']/args.num_games}, numberOfTimeCorrectBombListReturned={totals['numWins']}")
+
+if __name__ == '__main__':
+    main()
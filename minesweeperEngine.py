@@ -0,0 +1,202 @@
+import numpy as np
+import random
+from collections import deque
+import time
+import json
+import minesweeperBoards
+import minesweeperLog
+
+# Headless game engine. Holds the answer grid and the opened mask as arrays, so games can be
+# played (and benchmarked) without a Tk window or any per-cell widget work.
+log = minesweeperLog.getLogger('engine')
+
+class GameEngine:
+
+    def __init__(self, numRows, numCols, numBombs, safeSquare):
+
+        # game variables that can be accessed in any method in the class. For example, to access the number of rows, use "self.numRows"
+        self.numRows = numRows
+        self.numCols = numCols
+        self.numBombs = numBombs
+        self.safeSquare = safeSquare
+
+        self.ans = np.full((self.numRows, self.numCols), 0)
+        self.opened = np.zeros((self.numRows, self.numCols), dtype=bool)
+        self.bombLocations = []
+
+        self.nextSquaresToOpen = [safeSquare]
+        self.outcome = 0
+        self.numDigs = 0
+        self.time = 0
+        self.moveTime = 0  # how long the AI took for the last move
+
+    # load a test case file ({"dim", "bombs", "safe", "board"}) into a new engine
+    @classmethod
+    def fromFile(cls, testcase_filename):
+        with open(testcase_filename) as fp:
+            data = json.load(fp)
+
+        boardSize = data['dim'].split(',')
+        safe = data['safe'].split(',')
+
+        engine = cls(int(boardSize[0]), int(boardSize[1]), int(data['bombs']), (int(safe[0]), int(safe[1])))
+        engine.create_board(data['board'])
+        return engine
+
+    # load board i of a minesweeperCorpus.Corpus into a new engine
+    @classmethod
+    def fromCorpus(cls, corpus, i):
+        board, safe = corpus[i]
+        engine = cls(corpus.numRows, corpus.numCols, corpus.numBombs, safe)
+        engine.load_board(board)
+        return engine
+
+    # uncover a square and return its value (9 is a bomb)
+    def open_square(self, r, c):
+        if not self.squareInBounds(r, c):
+            return None
+
+        self.opened[r][c] = True
+        return self.ans[r][c]
+
+    # uncover a square and, if it is a 0, everything reachable from it through 0s (a BFS on the answer grid),
+    # the way a human player's click does. Returns the square and every square it newly uncovered, as a list
+    # of ((row, col), value)
+    def revealRegion(self, r, c):
+        if not self.squareInBounds(r, c):
+            return []
+
+        self.opened[r][c] = True
+        revealed = [((r, c), int(self.ans[r][c]))]
+        pending = deque([(r, c)] if revealed[0][1] == 0 else [])
+        while pending:
+            row, col = pending.popleft()
+            for n_r in range(max(row - 1, 0), min(row + 2, self.numRows)):
+                for n_c in range(max(col - 1, 0), min(col + 2, self.numCols)):
+                    if self.opened[n_r][n_c]:
+                        continue
+                    self.opened[n_r][n_c] = True
+                    value = int(self.ans[n_r][n_c])
+                    revealed.append(((n_r, n_c), value))
+                    if value == 0:
+                        pending.append((n_r, n_c))
+        return revealed
+
+    # (helper function): return true if and only if all non-bomb squares have been uncovered (game is won)
+    def isGameWon(self):
+        return np.count_nonzero(~self.opened) == self.numBombs
+
+    # (helper function): return true if and only if a square (r, c) is within the game grid
+    def squareInBounds(self, r, c):
+        return r >= 0 and c >= 0 and r < self.numRows and c < self.numCols
+
+    # (helper function): return true if and only if the board has all covered (unopened) squares
+    def isNewBoard(self):
+        return not self.opened.any()
+
+    # (helper function): get the current board state from player POV. Note -1 represents unknown square
+    def getBoardState(self):
+        return np.where(self.opened, self.ans, -1)
+
+    # generate a random board based on inputs {self.numRows, self.numCols, self.numBombs, self.safeSquare}.
+    # rng is a numpy Generator, by default seeded from the random module
+    def generate_board(self, rng=None):
+        if rng is None:
+            rng = np.random.default_rng(random.getrandbits(64))
+
+        self.ans = minesweeperBoards.generate_board(rng, self.numRows, self.numCols, self.numBombs, self.safeSquare)
+        self.bombLocations = minesweeperBoards.bomb_locations(self.ans)
+
+        log.debug('generated board\n%s', self.ans)
+
+    # use an answer grid (rows x cols, 0-8 numbers and 9 bombs) as the board
+    def load_board(self, board):
+        self.ans = np.array(board, dtype=np.int8)
+        self.bombLocations = minesweeperBoards.bomb_locations(self.ans)
+
+    # generate a board based on test case input, a column-major string of numRows*numCols digits
+    def create_board(self, gridInput):
+        self.load_board(minesweeperBoards.decode_board(gridInput, self.numRows, self.numCols))
+        if len(self.bombLocations) != self.numBombs:
+            raise ValueError(f"board has {len(self.bombLocations)} bombs, expected {self.numBombs}")
+
+        log.info("starting board\n%s", self.ans)
+        log.info("location of bombs: %s", self.bombLocations)
+
+    # parse the user's command and perform the appropriate action.
+    def parseAIAlgo(self, userCommand):
+        if type(userCommand) is not tuple:
+            log.warning("cannot parse command %r", userCommand)
+        elif "open_squares" in userCommand[0]:
+            self.nextSquaresToOpen = list(userCommand[1])
+        elif "open_square" in userCommand[0]:
+            self.nextSquaresToOpen = [userCommand[1]]
+        elif "final_answer" in userCommand[0]:
+            userAnswer = userCommand[1]
+            self.numDigs = np.count_nonzero(self.opened)
+            if set(self.bombLocations) == set(userAnswer):
+                self.outcome = 1
+                log.info("CORRECT BOMB LIST! You performed %d digs.", self.numDigs)
+            else:
+                self.outcome = -1
+                log.info("WRONG BOMB LIST. expected: %s, received: %s. You performed %d digs.", self.bombLocations, userAnswer, self.numDigs)
+
+    # open the squares chosen last iteration and return what they revealed, as ((row, col), value) pairs.
+    # With regions a 0 also reveals its whole region (see revealRegion)
+    def uncoverNext(self, regions=False):
+        revealed = []
+        for r, c in self.nextSquaresToOpen:
+            if regions:
+                if not revealed or not self.opened[r][c]: # a region revealed earlier in this move may hold it
+                    revealed.extend(self.revealRegion(r, c))
+            elif self.squareInBounds(r, c):
+                revealed.append(((r, c), int(self.open_square(r, c))))
+        return revealed
+
+    """
+    One iteration of the game loop:
+    1) uncover the squares chosen last iteration: one for an open_square command, a list of them for
+       open_squares. Note a safe square is given for the first iteration
+    2) hand what changed to the AI and time its call: an AI with performAIDelta() gets the newly revealed squares,
+       as a list of ((row, col), value), and keeps its own view of the board. If it also sets reveal_regions,
+       a 0 uncovers its whole region of 0s and their borders in this one move (see revealRegion), which only
+       suits an AI that would open all of them anyway: the uncovered squares count as digs. Any other AI gets
+       the whole board state in performAI(). Either way an AI without reveal_regions uncovers exactly the
+       squares it asked for
+    3) parse the command it returns
+    """
+    def performMove(self, AI):
+        if self.outcome != 0:
+            return None # game is already over (won or loss)
+
+        squares = self.nextSquaresToOpen # the safe square on the first iteration
+
+        if hasattr(AI, 'performAIDelta'):
+            revealed = self.uncoverNext(getattr(AI, 'reveal_regions', False))
+            startTime = time.time()
+            userCommand = AI.performAIDelta(revealed)
+        else:
+            for r, c in squares:
+                self.open_square(r, c)
+            boardState = self.getBoardState()
+            startTime = time.time()
+            userCommand = AI.performAI(boardState)
+        endTime = time.time()
+        self.moveTime = endTime - startTime
+        self.time += self.moveTime
+
+        self.parseAIAlgo(userCommand)
+        return userCommand
+
+    # play the game as a flat loop, yielding the command the AI returned after every move
+    def moves(self, AI):
+        while self.outcome == 0:
+            yield self.performMove(AI)
+
+    # play moves until the AI submits its final answer, returns the outcome (1 = correct, -1 = wrong).
+    # onMove(engine, userCommand) is called after every move, e.g. to record self.moveTime
+    def play(self, AI, onMove=None):
+        for userCommand in self.moves(AI):
+            if onMove is not None:
+                onMove(self, userCommand)
+        return self.outcome
@@ -0,0 +1,98 @@
+# Frontier constraints and their decomposition into independent components.
+# A constraint is (cells, remaining): exactly `remaining` of the unknown `cells` are bombs. Two unknown
+# cells are connected if some constraint mentions both, and constraints in different connected
+# components share no cells, so every component can be solved on its own.
+
+class Component:
+
+    def __init__(self, constraints):
+        self.constraints = constraints
+        self.cells = frozenset().union(*[cells for cells, remaining in constraints])
+        self.key = frozenset(constraints)  # identifies the component until one of its cells changes
+
+# The constraints of the numbered cells, kept up to date as cells are revealed or found to be bombs, so the
+# constraints next to a few dirty cells are found without scanning the board. An unknown cell is one that is
+# neither revealed nor a known bomb; a numbered cell is dropped once it has no unknown neighbor left.
+class FrontierIndex:
+
+    def __init__(self, neighbors):
+        self.neighbors = neighbors  # the AI's neighbors(row, col) generator
+        self.numbers = {}  # numbered cell -> [its unknown neighbors, how many of them are bombs]
+        self.around = {}  # unknown cell -> the numbered cells next to it
+        self.revealed = set()
+        self.bombs = set()
+
+    def decide(self, cell, is_bomb):
+        for number in self.around.pop(cell, ()):
+            unknown = self.numbers[number][0]
+            unknown.discard(cell)
+            self.numbers[number][1] -= is_bomb
+            if not unknown:
+                del self.numbers[number]
+
+    def add_bomb(self, cell):
+        if cell not in self.bombs:
+            self.bombs.add(cell)
+            self.decide(cell, 1)
+
+    # cell was revealed, showing value (a bomb if 9)
+    def reveal(self, cell, value):
+        if value == 9:
+            self.add_bomb(cell)
+            return
+        if cell in self.revealed:
+            return
+        self.revealed.add(cell)
+        self.decide(cell, 0)
+
+        unknown = set()
+        remaining = int(value)
+        for neighbor in self.neighbors(*cell):
+            if neighbor in self.bombs:
+                remaining -= 1
+            elif neighbor not in self.revealed:
+                unknown.add(neighbor)
+        if unknown:
+            self.numbers[cell] = [unknown, remaining]
+            for neighbor in unknown:
+                self.around.setdefault(neighbor, set()).add(cell)
+
+    # the constraints of the numbered cells with an unknown neighbor in dirty (every constraint if dirty is
+    # None), in board order
+    def constraints(self, dirty=None):
+        if dirty is None:
+            numbers = self.numbers
+        else:
+            numbers = set(number for cell in dirty for number in self.around.get(cell, ()))
+        return [(frozenset(self.numbers[number][0]), self.numbers[number][1]) for number in sorted(numbers)]
+
+# Group constraints into connected components (union-find over their cells).
+def split_components(constraints):
+    parent = {}
+
+    def find(cell):
+        root = cell
+        while parent[root] != root:
+            root = parent[root]
+        while parent[cell] != root:
+            parent[cell], cell = root, parent[cell]
+        return root
+
+    for cells, remaining in constraints:
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        first = None
+        for cell in cells:
+            if first is None:
+                first = find(cell)
+            else:
+                root = find(cell)
+                if root != first:
+                    parent[root] = first
+
+    groups = {}
+    for constraint in constraints:
+        cells = constraint[0]
+        root = find(next(iter(cells))) if cells else None
+        groups.setdefault(root, []).append(constraint)
+    return [Component(group) for group in groups.values()]
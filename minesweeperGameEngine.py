@@ -5,8 +5,9 @@ from tkinter import *
 import random
 import minesweeperAI1 
 import minesweeperAI2
-import json
+import minesweeperEngine
 import argparse
+import logging
 
 # Here, we are creating our class, Window, and inheriting from the Frame
 # class. Frame is a class from the tkinter module. (see Lib/tkinter/__init__)
@@ -24,20 +25,15 @@ class Window(Frame):
         #with that, we want to then run init_window, which doesn't yet exist
         self.outcome = 0
 
-        with open(testcase_filename) as fp:
-            data = json.load(fp)
-
-        boardSize = data['dim'].split(',')
-        safe = data['safe'].split(',')
+        self.engine = minesweeperEngine.GameEngine.fromFile(testcase_filename)
 
         # game variables that can be accessed in any method in the class. For example, to access the number of rows, use "self.numRows"         
-        self.numRows = int(boardSize[0])
-        self.numCols = int(boardSize[1])
-        self.numBombs = int(data['bombs'])
-        self.safeSquare = (int(safe[0]), int(safe[1]))
-        self.gridInput = data['board']
+        self.numRows = self.engine.numRows
+        self.numCols = self.engine.numCols
+        self.numBombs = self.engine.numBombs
+        self.safeSquare = self.engine.safeSquare
 
-        print(self.numRows, self.numCols, self.numBombs, self.safeSquare, self.gridInput)
+        print(self.numRows, self.numCols, self.numBombs, self.safeSquare)
 
         self.init_window()
 
@@ -57,7 +53,6 @@ class Window(Frame):
                 curRow[col].grid(row=row, column=col)
             self.button.append(curRow)
 
-        self.create_board()
         AIAlgo1Button = Button(self, bg="blue", text="AI 1", width=6, height=5, command=self.AIAlgo1)
         AIAlgo1Button.place(x=6000, y=1500)
         self.AI1 = minesweeperAI1.AI1(self.numRows, self.numCols, self.numBombs, self.safeSquare)
@@ -74,21 +69,18 @@ class Window(Frame):
         if not self.squareInBounds(r, c):
             return
 
+        value = self.engine.open_square(r, c)
         self.button[r][c].config(state="disabled")
-        if self.ans[r][c] != 9:
-            self.button[r][c]["text"] = self.ans[r][c]
+        if value != 9:
+            self.button[r][c]["text"] = value
             self.button[r][c]["bg"] = "white"
         else:
-            self.button[r][c]["text"] = self.ans[r][c]
+            self.button[r][c]["text"] = value
             self.button[r][c]["bg"] = "red"
 
     # (helper function): return true if and only if all non-bomb squares have been uncovered (game is won) 
     def isGameWon(self):
-        cnt = 0
-        for row in range(self.numRows):
-            for col in range(self.numCols):
-                if self.button[row][col]['state'] != 'disabled': cnt += 1
-        return cnt == self.numBombs
+        return self.engine.isGameWon()
 
     # (helper function): return true if and only if a square (r, c) is within the game grid
     def squareInBounds(self, r, c):
@@ -96,11 +88,7 @@ class Window(Frame):
 
     # (helper function): return true if and only if the board has all covered (unopened) squares
     def isNewBoard(self):
-        for row in range(self.numRows):
-            for col in range(self.numCols):
-                if self.button[row][col]['state'] == 'disabled':
-                    return False
-        return True   
+        return self.engine.isNewBoard()
 
     # (helper function): change the color of specified square to blue to indicate this is the square you will select next
     def highlight_button(self, square):
@@ -109,45 +97,15 @@ class Window(Frame):
 
     # (helper function): get the current board state from player POV. Note -1 represents unknown square
     def getBoardState(self):
-        board = np.full((self.numRows, self.numCols), -1)
-        for row in range(self.numRows):
-            for col in range(self.numCols):
-                value = 0
-                if self.button[row][col]['state'] == 'disabled':
-                    if self.button[row][col]["text"] != "":
-                        value = int(self.button[row][col]["text"])
-                    board[row][col] = value
-        return board
-
-    # generate a board based on test case input
-    def create_board(self):
-
-        self.ans = np.full((self.numRows, self.numCols), 0)
-        self.bombLocations = [(i % self.numCols, int(i/self.numCols)) for i, c in enumerate(self.gridInput) if c == 9 or c == '9']
-        # Add numbers 0-8 to the ans grid 
-        for row in range(self.numRows):
-            for col in range(self.numCols):
-                self.ans[col][row] = self.gridInput[row * self.numCols + col]
-
-        print(f"starting board\n{self.ans}")
-        print(f"location of bombs: {self.bombLocations}")
+        return self.engine.getBoardState()
 
     # parse the user's command and perform the appropriate action.
     def parseAIAlgo(self, userCommand):
-        if type(userCommand) is not tuple:
-            print("cannot parse command")
-        elif "open_square" in userCommand[0]:
+        self.engine.parseAIAlgo(userCommand)
+        self.outcome = self.engine.outcome
+        if self.outcome == 0 and type(userCommand) is tuple and "open_square" in userCommand[0]:
             self.nextSquareToOpen = userCommand[1]
             self.highlight_button(self.nextSquareToOpen)
-        elif "final_answer" in userCommand[0]:
-            userAnswer = userCommand[1]
-            self.numDigs = np.count_nonzero(self.getBoardState() != -1)
-            if set(self.bombLocations) == set(userAnswer):
-                self.outcome = 1
-                print(f"CORRECT BOMB LIST! You performed {self.numDigs} digs")
-            else:
-                self.outcome = -1
-                print(f"WRONG BOMB LIST. expected: {self.bombLocations}, received: {userAnswer}. You performed {self.numDigs} digs")
 
     """
     Each time you click the button, We would recommend you to perform the following loop in your algorithm:
@@ -198,6 +156,8 @@ class Window(Frame):
         for r, c in self.AI2.dirty_tiles:
             self.button[r][c]["bg"] = "orange"
 
+logging.basicConfig(stream=sys.stdout, level=logging.DEBUG, format='%(message)s')
+
 root = Tk()
 root.geometry("800x800")
 
@@ -0,0 +1,38 @@
+import logging
+from collections import deque
+
+# All loggers live under 'minesweeper' (minesweeper.engine, minesweeper.ai1, ...). Nothing is configured by
+# default, so a debug message is dropped inside logger.debug() before its arguments are ever formatted.
+# Trace mode keeps the latest messages of one game in a ring buffer, so they can be dumped if the game fails.
+
+def getLogger(name):
+    return logging.getLogger('minesweeper.' + name)
+
+class TraceBuffer(logging.Handler):
+
+    def __init__(self, capacity):
+        super().__init__(logging.DEBUG)
+        self.records = deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter('%(name)s %(levelname)s %(message)s'))
+
+    def emit(self, record):
+        # format now, the arguments (e.g. the known bombs set) keep changing after the call
+        record.msg = record.getMessage()
+        record.args = None
+        self.records.append(record)
+
+    def lines(self):
+        return [self.format(record) for record in self.records]
+
+# record every minesweeper message into a new ring buffer of the last capacity messages
+def startTrace(capacity):
+    buffer = TraceBuffer(capacity)
+    logger = logging.getLogger('minesweeper')
+    logger.addHandler(buffer)
+    logger.setLevel(logging.DEBUG)
+    return buffer
+
+def stopTrace(buffer):
+    logger = logging.getLogger('minesweeper')
+    logger.removeHandler(buffer)
+    logger.setLevel(logging.NOTSET)
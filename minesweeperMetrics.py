@@ -0,0 +1,77 @@
+import numpy as np
+import time
+import contextlib
+
+# Per-game instrumentation, every AI carries one as self.metrics. Times are wall seconds.
+#   move_times:      the AI time of every move, in move order (recorded by the game loop's onMove hook)
+#   phase_times:     'encode' = building formulas (CNF, z3 constraints, the tactic chain down to bits),
+#                    'search' = inside SAT solver calls
+#   recompute_calls: SAT calls made by each recompute, frontier_sizes: frontier cells each recompute looked at
+#   query_variables, query_clauses: size of the formula behind each SAT call
+
+# latency histogram buckets: 10 per decade from 1us to 100s, so histograms of different games can be summed
+HISTOGRAM_EDGES = np.logspace(-6, 2, 81)
+PERCENTILES = (50, 95, 99)
+
+class Metrics:
+
+    def __init__(self):
+        self.move_times = []
+        self.phase_times = {'encode': 0.0, 'search': 0.0}
+        self.recompute_calls = []
+        self.frontier_sizes = []
+        self.query_variables = []
+        self.query_clauses = []
+
+    def record_move(self, seconds):
+        self.move_times.append(seconds)
+
+    def record_query(self, variables, clauses):
+        self.query_variables.append(variables)
+        self.query_clauses.append(clauses)
+
+    def record_recompute(self, sat_calls, frontier_size):
+        self.recompute_calls.append(sat_calls)
+        self.frontier_sizes.append(frontier_size)
+
+    # time the body of a with block into phase_times[phase]
+    @contextlib.contextmanager
+    def timing(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[phase] += time.perf_counter() - start
+
+    def histogram(self):
+        return np.histogram(np.clip(self.move_times, HISTOGRAM_EDGES[0], HISTOGRAM_EDGES[-1]), bins=HISTOGRAM_EDGES)[0]
+
+    # flat record of the game's metrics, what the runner stores per board
+    def summary(self):
+        times = np.array(self.move_times)
+        summary = {
+            'moves': len(times),
+            'move_times': list(self.move_times),
+            'latency_histogram': self.histogram().tolist(),
+            'encode_time': self.phase_times['encode'],
+            'search_time': self.phase_times['search'],
+            'recomputes': len(self.recompute_calls),
+            'recompute_sat_calls': sum(self.recompute_calls),
+            'max_recompute_sat_calls': max(self.recompute_calls, default=0),
+            'frontier_cells': sum(self.frontier_sizes),
+            'max_frontier_size': max(self.frontier_sizes, default=0),
+            'query_variables': sum(self.query_variables),
+            'query_clauses': sum(self.query_clauses),
+        }
+        for q in PERCENTILES:
+            summary[f'latency_p{q}'] = float(np.percentile(times, q)) if len(times) else 0.0
+        summary['worst_move'] = int(np.argmax(times)) if len(times) else -1
+        summary['worst_move_time'] = float(times.max()) if len(times) else 0.0
+        return summary
+
+# the q-th percentile of a (summed) latency histogram, as the upper edge of the bucket it falls in
+def histogram_percentile(histogram, q):
+    counts = np.cumsum(histogram)
+    if not len(counts) or counts[-1] == 0:
+        return 0.0
+    return float(HISTOGRAM_EDGES[1:][np.searchsorted(counts, counts[-1] * q / 100)])
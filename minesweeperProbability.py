@@ -0,0 +1,217 @@
+# Exact mine probabilities for guessing.
+# Every frontier component (see minesweeperFrontier) is counted on its own: for each number of bombs k,
+# how many assignments of its cells satisfy all of its constraints, and in how many of those each cell
+# is a bomb. The components are then combined with the cells off the frontier, weighting a frontier
+# assignment with K bombs by comb(off_frontier_cells, bombs_left - K), which is exactly how many ways
+# the remaining bombs can be spread over the rest of the board. The combination is done in floats, with
+# every count scaled, since only the ratios of the weights matter.
+import numpy as np
+from math import exp, log
+import random
+import minesweeperFrontier
+
+# Give up on a component (and fall back to the caller's guess) if one step of the count needs more states.
+MAX_STATES = 20000
+
+# polynomial helpers, p[k] = number of assignments with k bombs
+def poly_mul(a, b):
+    out = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                out[i + j] += x * y
+    return out
+
+def poly_add_into(acc, p, shift=0):
+    if len(acc) < len(p) + shift:
+        acc.extend([0] * (len(p) + shift - len(acc)))
+    for i, x in enumerate(p):
+        acc[i + shift] += x
+
+# Order cells so that cells sharing constraints are close together (BFS from a peripheral cell), which
+# keeps the number of half-assigned constraints, and therefore the number of counting states, small.
+def cell_order(component):
+    adjacent = {cell: set() for cell in component.cells}
+    for cells, remaining in component.constraints:
+        for cell in cells:
+            adjacent[cell].update(cells)
+
+    def bfs(start):
+        order = [start]
+        seen = {start}
+        for cell in order:
+            for other in sorted(adjacent[cell] - seen):
+                seen.add(other)
+                order.append(other)
+        return order
+
+    return bfs(bfs(min(component.cells))[-1])
+
+# Count the assignments of one component. Returns (cells, totals, bomb_counts) where totals[k] is the number
+# of satisfying assignments with k bombs and bomb_counts[cell][k] how many of those have a bomb on cell,
+# or None if the component is too large to count exactly.
+def count_component(component):
+    order = cell_order(component)
+    n = len(order)
+    constraints = list(component.constraints)
+    position = {cell: i for i, cell in enumerate(order)}
+    touching = [[] for i in range(n)]  # cell index -> constraints that contain it
+    unassigned_after = [[] for i in range(n)]  # cell index -> cells of those constraints still unassigned after it
+    for ci, (cells, remaining) in enumerate(constraints):
+        positions = sorted(position[cell] for cell in cells)
+        for j, pos in enumerate(positions):
+            touching[pos].append(ci)
+            unassigned_after[pos].append(len(positions) - j - 1)
+
+    # forward pass: states[i] maps "bombs still needed by each constraint" to the prefix polynomial
+    start = tuple(remaining for cells, remaining in constraints)
+    states = [{start: [1]}]
+    for i in range(n):
+        nxt = {}
+        for need, poly in states[i].items():
+            for bomb in (0, 1):
+                new_need = successor(need, touching[i], unassigned_after[i], bomb)
+                if new_need is not None:
+                    poly_add_into(nxt.setdefault(new_need, []), poly, bomb)
+        if not nxt or len(nxt) > MAX_STATES:
+            return None
+        states.append(nxt)
+
+    # backward pass: suffix[need] is the polynomial of ways to finish cells i.. from that state
+    suffix = {need: [1] for need in states[n]}
+    bomb_counts = {}
+    for i in range(n - 1, -1, -1):
+        cur = {}
+        marginal = []
+        for need, prefix in states[i].items():
+            for bomb in (0, 1):
+                new_need = successor(need, touching[i], unassigned_after[i], bomb)
+                if new_need is None or new_need not in suffix:
+                    continue
+                poly_add_into(cur.setdefault(need, []), suffix[new_need], bomb)
+                if bomb:
+                    poly_add_into(marginal, poly_mul(prefix, suffix[new_need]), 1)
+        suffix = cur
+        bomb_counts[order[i]] = marginal
+
+    totals = suffix[start]
+    return order, totals, bomb_counts
+
+# the constraint needs after giving cell i the value bomb, or None if that breaks a constraint
+def successor(need, touching, unassigned_after, bomb):
+    new_need = list(need)
+    for ci, left in zip(touching, unassigned_after):
+        new_need[ci] -= bomb
+        if new_need[ci] < 0 or new_need[ci] > left:
+            return None
+    return tuple(new_need)
+
+# comb(num_off, bombs_left - k) for k in range(length), scaled so the largest is 1. The binomials themselves
+# have thousands of digits on a big board, so they are built from the ratio of neighbours,
+# comb(n, b - 1) / comb(n, b) = b / (n - b + 1), in log space.
+def off_frontier_weights(num_off, bombs_left, length):
+    first = max(0, bombs_left - num_off)  # fewer frontier bombs leave more bombs than cells off the frontier
+    logs = {}
+    log_weight = 0.0
+    for k in range(first, min(bombs_left, length - 1) + 1):
+        logs[k] = log_weight
+        b = bombs_left - k
+        if b > 0:
+            log_weight += log(b) - log(num_off - b + 1)
+    if not logs:
+        return [0.0] * length
+    top = max(logs.values())
+    return [exp(logs[k] - top) if k in logs else 0.0 for k in range(length)]
+
+class MineProbability:
+
+    def __init__(self):
+        self.cache = {}  # component key -> count_component result, for the components of the last call
+        self.total_cache_hits = 0
+        self.total_components_counted = 0
+
+    def count(self, component):
+        if component.key in self.cache:
+            self.total_cache_hits += 1
+        else:
+            self.total_components_counted += 1
+            self.cache[component.key] = count_component(component)
+        return self.cache[component.key]
+
+    # Probability of a bomb for every frontier cell, and for each one of the num_unknown - len(frontier) unknown
+    # cells off the frontier (None if there are none), or None if some component could not be counted.
+    # constraints must cover every numbered cell that touches an unknown cell.
+    def frontier_probabilities(self, constraints, num_unknown, bombs_left):
+        components = minesweeperFrontier.split_components(constraints)
+        counted = []
+        for component in components:
+            result = self.count(component)
+            if result is None:
+                return None
+            # only ratios matter, so scale each component's counts to floats around 1
+            cells, totals, bomb_counts = result
+            scale = max(totals)
+            counted.append((cells, [ways / scale for ways in totals],
+                            {cell: [ways / scale for ways in bomb_counts[cell]] for cell in cells}))
+        # a component whose cells changed never comes back, so only the current ones are worth keeping
+        self.cache = {component.key: self.cache[component.key] for component in components}
+
+        frontier = set()
+        for cells, totals, bomb_counts in counted:
+            frontier.update(cells)
+        num_off = num_unknown - len(frontier)
+
+        # prefix/suffix products, so the "every other component" polynomial costs no division
+        prefix = [[1.0]]
+        for cells, totals, bomb_counts in counted:
+            prefix.append(poly_mul(prefix[-1], totals))
+        suffix = [[1.0]]
+        for cells, totals, bomb_counts in reversed(counted):
+            suffix.append(poly_mul(suffix[-1], totals))
+        suffix.reverse()
+
+        everything = prefix[-1]
+        spread = off_frontier_weights(num_off, bombs_left, len(everything))
+        weight = sum(ways * spread[k] for k, ways in enumerate(everything))
+        if weight == 0:
+            return None
+
+        probabilities = {}
+        for i, (cells, totals, bomb_counts) in enumerate(counted):
+            others = poly_mul(prefix[i], suffix[i + 1])
+            # outside[k] = ways to complete the board if this component holds k bombs
+            outside = [sum(ways * spread[k + j] for j, ways in enumerate(others)) for k in range(len(totals))]
+            for cell in cells:
+                probabilities[cell] = sum(ways * outside[k] for k, ways in enumerate(bomb_counts[cell])) / weight
+
+        off_probability = None
+        if num_off:
+            # comb(num_off - 1, b - 1) = comb(num_off, b) * b / num_off
+            off_weight = sum(ways * spread[k] * (bombs_left - k) / num_off for k, ways in enumerate(everything))
+            off_probability = off_weight / weight
+        return probabilities, off_probability
+
+    # The unknown cell least likely to be a bomb (ties broken at random), or None if it can't be computed exactly.
+    # unknown is a (rows, cols) bool mask of the unknown cells, so the cells off the frontier are only counted,
+    # never listed: a guess costs the size of the frontier plus a few array operations, not a pass over the board.
+    def safest_cell(self, constraints, unknown, bombs_left):
+        num_unknown = int(np.count_nonzero(unknown))
+        result = self.frontier_probabilities(constraints, num_unknown, bombs_left)
+        if result is None:
+            return None
+        probabilities, off_probability = result
+        candidates = list(probabilities.values()) + ([off_probability] if off_probability is not None else [])
+        if not candidates:
+            return None
+        lowest = min(candidates)
+        tied = sorted(cell for cell, probability in probabilities.items() if probability <= lowest + 1e-12)
+        if off_probability is None or off_probability > lowest + 1e-12:
+            return random.choice(tied)
+
+        # the cells off the frontier tie too: pick among them and the tied frontier cells, in board order
+        tied_mask = unknown.copy()
+        for cell, probability in probabilities.items():
+            if probability > lowest + 1e-12:
+                tied_mask[cell] = False
+        row, col = np.unravel_index(random.choice(np.flatnonzero(tied_mask)), unknown.shape)
+        return int(row), int(col)
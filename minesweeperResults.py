@@ -0,0 +1,141 @@
+import numpy as np
+import argparse
+import csv
+import json
+import sys
+
+# Benchmark results as one record per game, in JSON Lines (.jsonl) or CSV (.csv, list fields JSON encoded).
+# A record is the runner's per-game result (see minesweeperRunner.playGame) plus the run's context:
+# board dimensions, bomb count and density, AI type and backend.
+# `python minesweeperResults.py compare base.jsonl new.jsonl` flags throughput and latency regressions and
+# exits with status 1 if there are any, so it can gate solver changes.
+
+# the fields that lead every record, in this order; the rest follow in the order the runner produced them
+LEADING_FIELDS = ('board', 'seed', 'numRows', 'numCols', 'numBombs', 'density', 'algo', 'backend', 'outcome', 'digs', 'time', 'moves')
+
+# what compare checks: (summary key, description, True if higher is better)
+COMPARED = [
+    ('winRate', 'win rate', True),
+    ('gamesPerSecond', 'throughput (games/s of AI time)', True),
+    ('movesPerSecond', 'throughput (moves/s of AI time)', True),
+    ('latencyP50', 'move latency p50', False),
+    ('latencyP95', 'move latency p95', False),
+    ('latencyP99', 'move latency p99', False),
+    ('worstMove', 'worst move', False),
+]
+
+# the context fields of a run of numBombs on numRows x numCols boards by algo (and backend, for algo 2 and 3)
+def run_context(numRows, numCols, numBombs, algo, backend=None):
+    if backend is None:
+        backend = {2: 'cdcl', 3: 'z3-pb'}.get(algo)
+    return {'numRows': numRows, 'numCols': numCols, 'numBombs': numBombs, 'density': numBombs/(numRows*numCols), 'algo': algo, 'backend': backend}
+
+# a result extended with its run's context, leading fields first
+def make_record(result, context=None):
+    record = dict(context or {}, **result)
+    fields = [field for field in LEADING_FIELDS if field in record] + [field for field in record if field not in LEADING_FIELDS]
+    return {field: record[field] for field in fields}
+
+# append one record to an open JSON Lines file, flushed so a crash loses at most the records being written
+def append_record(fp, record):
+    fp.write(json.dumps(record) + '\n')
+    fp.flush()
+
+def file_format(filename):
+    return 'csv' if filename.endswith('.csv') else 'jsonl'
+
+# write the per-game results of a run, each extended with context (e.g. {'numRows': 16, 'algo': 2})
+def write_results(filename, results, context=None):
+    records = [make_record(result, context) for result in results]
+    fields = []
+    for record in records:
+        fields.extend(field for field in record if field not in fields)
+
+    with open(filename, 'w', newline='') as fp:
+        if file_format(filename) == 'csv':
+            writer = csv.DictWriter(fp, fieldnames=fields)
+            writer.writeheader()
+            for record in records:
+                writer.writerow({field: json.dumps(value) if isinstance(value, (list, dict)) else value for field, value in record.items()})
+        else:
+            for record in records:
+                append_record(fp, record)
+
+def read_results(filename):
+    with open(filename, newline='') as fp:
+        if file_format(filename) == 'jsonl':
+            return [json.loads(line) for line in fp if line.strip()]
+        return [{field: parse_cell(value) for field, value in row.items()} for row in csv.DictReader(fp)]
+
+# CSV cells are strings, turn numbers and JSON encoded lists back into values
+def parse_cell(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+# the numbers compare looks at, over every game and every move of a results file
+def summarize(records):
+    times = np.array([t for record in records for t in record.get('move_times', [])])
+    totalTime = sum(record['time'] for record in records)
+    summary = {
+        'games': len(records),
+        'winRate': sum(1 for record in records if record['outcome'] == 1) / max(len(records), 1),
+        'gamesPerSecond': len(records) / totalTime if totalTime else 0.0,
+        'movesPerSecond': len(times) / totalTime if totalTime else 0.0,
+        'satSolves': sum(record.get('total_sat_solves', 0) for record in records),
+    }
+    for q in (50, 95, 99):
+        summary[f'latencyP{q}'] = float(np.percentile(times, q)) if len(times) else 0.0
+    summary['worstMove'] = float(times.max()) if len(times) else 0.0
+    return summary
+
+# compare two summaries, returns the (description, baseline, candidate, relative change) of every regression
+# worse than tolerance (0.1 = 10%)
+def regressions(baseline, candidate, tolerance):
+    found = []
+    for key, description, higherIsBetter in COMPARED:
+        old, new = baseline[key], candidate[key]
+        if old == 0:
+            continue
+        change = (new - old) / old
+        if (-change if higherIsBetter else change) > tolerance:
+            found.append((description, old, new, change))
+    return found
+
+def print_summary(name, summary):
+    print(f"{name}: games={summary['games']}, winRate={round(summary['winRate'], 4)}, gamesPerSecond={round(summary['gamesPerSecond'], 3)}, "
+          f"movesPerSecond={round(summary['movesPerSecond'], 1)}, SAT solves={summary['satSolves']}, "
+          f"p50={round(1000*summary['latencyP50'], 3)}ms, p95={round(1000*summary['latencyP95'], 3)}ms, "
+          f"p99={round(1000*summary['latencyP99'], 3)}ms, worst move={round(1000*summary['worstMove'], 3)}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='summarize and compare benchmark results files (.jsonl or .csv)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('summary', help='print the summary of results files')
+    command.add_argument('files', nargs='+')
+
+    command = commands.add_parser('compare', help='compare a candidate results file against a baseline, exit status 1 on a regression')
+    command.add_argument('baseline')
+    command.add_argument('candidate')
+    command.add_argument('--tolerance', default=0.1, type=float, help='allowed relative slowdown, default 0.1 (10%%)')
+
+    args = parser.parse_args()
+    if args.command == 'summary':
+        for name in args.files:
+            print_summary(name, summarize(read_results(name)))
+    elif args.command == 'compare':
+        baseline = summarize(read_results(args.baseline))
+        candidate = summarize(read_results(args.candidate))
+        print_summary('baseline', baseline)
+        print_summary('candidate', candidate)
+        found = regressions(baseline, candidate, args.tolerance)
+        for description, old, new, change in found:
+            print(f'REGRESSION: {description} {old:.6g} -> {new:.6g} ({change:+.1%})')
+        if not found:
+            print(f'no regressions beyond {args.tolerance:.0%}')
+        sys.exit(1 if found else 0)
+
+if __name__ == '__main__':
+    main()
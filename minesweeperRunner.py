@@ -0,0 +1,193 @@
+import numpy as np
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import minesweeperAI1
+import minesweeperAI2
+import minesweeperAI2_z3
+import minesweeperBatch
+import minesweeperCorpus
+import minesweeperEngine
+import minesweeperLog
+import minesweeperMetrics
+
+log = minesweeperLog.getLogger('runner')
+
+# build the AI for a game being played on engine (1 = AI1, 2 = AI2 on the 'cdcl' backend unless options name
+# another one, as --backend does, 3 = AI2 on the Z3 'z3-pb' backend, or 'z3-int' with the 'int' encoding).
+# options are passed on to the AI2 constructor, e.g. {'encoding': 'bool'}
+def createAI(engine, AIType, options=None):
+    options = options or {}
+    if AIType == 1:
+        return minesweeperAI1.AI1(engine.numRows, engine.numCols, engine.numBombs, engine.safeSquare)
+    elif AIType == 3:
+        return minesweeperAI2_z3.AI2(engine.numRows, engine.numCols, engine.numBombs, engine.safeSquare, **options)
+    else:
+        return minesweeperAI2.AI2(engine.numRows, engine.numCols, engine.numBombs, engine.safeSquare, **options)
+
+# derive one seed per game from the master seed. Game i always gets the same seed, no matter how
+# many workers the games are spread over.
+def gameSeeds(masterSeed, numGames):
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(masterSeed).spawn(numGames)]
+
+# play a single generated game and return its result record
+def runGame(numRows, numCols, numBombs, safeSquare, AIType, seed, options=None, trace=0):
+    engine = minesweeperEngine.GameEngine(numRows, numCols, numBombs, safeSquare)
+    engine.generate_board(np.random.default_rng(seed))
+    return playGame(engine, AIType, seed, options, trace)
+
+# play a batch of generated games of one board size, board ids boards[i] seeded by seeds[i]
+def runGameBatch(numRows, numCols, numBombs, safeSquare, AIType, boards, seeds, options=None, trace=0):
+    results = []
+    for board, seed in zip(boards, seeds):
+        results.append(runGame(numRows, numCols, numBombs, safeSquare, AIType, seed, options, trace))
+        results[-1]['board'] = board
+    return results
+
+# play generated games in lockstep (see minesweeperBatch), game i on the same board runGame would give seeds[i]
+def runLockstepGames(numRows, numCols, numBombs, safeSquare, AIType, seeds, options=None):
+    engines = []
+    for seed in seeds:
+        engines.append(minesweeperEngine.GameEngine(numRows, numCols, numBombs, safeSquare))
+        engines[-1].generate_board(np.random.default_rng(seed))
+    return playLockstep(engines, AIType, seeds, options)
+
+# corpora opened by this process, so a worker maps each file once
+openCorpora = {}
+
+# play board i of a corpus file and return its result record
+def runCorpusGame(corpusFilename, i, AIType, seed, options=None, trace=0):
+    if corpusFilename not in openCorpora:
+        openCorpora[corpusFilename] = minesweeperCorpus.Corpus(corpusFilename)
+    engine = minesweeperEngine.GameEngine.fromCorpus(openCorpora[corpusFilename], i)
+    result = playGame(engine, AIType, seed, options, trace)
+    result['board'] = i
+    return result
+
+# play boards[i] of a corpus file for every i in lockstep (see minesweeperBatch)
+def runLockstepCorpus(corpusFilename, boards, AIType, seeds, options=None):
+    if corpusFilename not in openCorpora:
+        openCorpora[corpusFilename] = minesweeperCorpus.Corpus(corpusFilename)
+    engines = [minesweeperEngine.GameEngine.fromCorpus(openCorpora[corpusFilename], i) for i in boards]
+    return playLockstep(engines, AIType, seeds, options)
+
+# play the games set up on engines in lockstep, game k seeding its guesses with seeds[k]
+def playLockstep(engines, AIType, seeds, options=None):
+    AIs = [createAI(engine, AIType, options) for engine in engines]
+    minesweeperBatch.playBatch(engines, AIs, seeds)
+    return [gameResult(engine, AI, AIType, seed) for engine, AI, seed in zip(engines, AIs, seeds)]
+
+# play the game set up on engine, seeding the AI's random guesses with seed. With trace > 0 the last trace
+# log messages of the game are kept, and returned in result['trace'] if the game is not won
+def playGame(engine, AIType, seed, options=None, trace=0):
+    random.seed(seed)
+    buffer = minesweeperLog.startTrace(trace) if trace else None
+    try:
+        log.debug('board (seed %d)\n%s', seed, engine.ans)
+        AI = createAI(engine, AIType, options)
+        engine.play(AI, onMove=lambda engine, userCommand: AI.metrics.record_move(engine.moveTime))
+    except Exception:
+        if buffer is not None:
+            log.error('game with seed %d failed, last %d messages:\n%s', seed, len(buffer.records), '\n'.join(buffer.lines()))
+        raise
+    finally:
+        if buffer is not None:
+            minesweeperLog.stopTrace(buffer)
+
+    result = gameResult(engine, AI, AIType, seed)
+    if buffer is not None and engine.outcome != 1:
+        result['trace'] = buffer.lines()
+    return result
+
+# the result record of a finished game
+def gameResult(engine, AI, AIType, seed):
+    result = {
+        'seed': seed,
+        'outcome': engine.outcome,
+        'digs': int(engine.numDigs),
+        'time': engine.time,
+    }
+    result.update(AI.metrics.summary())
+    result['total_components_counted'] = AI.probability.total_components_counted
+    result['total_probability_cache_hits'] = AI.probability.total_cache_hits
+    if AIType in (2, 3):
+        result['total_sat_variables'] = AI.total_sat_variables
+        result['total_sat_solve_steps'] = AI.total_sat_solve_steps
+        result['total_sat_solves'] = AI.total_sat_solves
+        result['total_sat_probes_skipped'] = AI.total_sat_probes_skipped
+        result['total_component_cache_hits'] = AI.total_component_cache_hits
+        for stage, count in AI.cells_resolved.items():
+            result['cells_resolved_' + stage] = count
+    return result
+
+# call function on the argument iterables, here or spread over a pool of workers, results in argument order
+def mapGames(function, args, numTasks, workers=1):
+    if workers <= 1:
+        return list(map(function, *args))
+
+    chunksize = max(1, numTasks // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(function, *args, chunksize=chunksize))
+
+# split seeds into batches of lockstep games
+def lockstepBatches(seeds, lockstep):
+    return [seeds[start:start + lockstep] for start in range(0, len(seeds), lockstep)]
+
+# play numGames generated games over a pool of workers, results come back in game order.
+# With lockstep > 0 the games are played lockstep games at a time (see minesweeperBatch), without traces
+def runGames(numRows, numCols, numBombs, safeSquare, AIType, numGames, workers=1, masterSeed=None, options=None, trace=0, lockstep=0):
+    seeds = gameSeeds(masterSeed, numGames)
+    if lockstep:
+        batches = lockstepBatches(seeds, lockstep)
+        args = (repeat(numRows), repeat(numCols), repeat(numBombs), repeat(safeSquare), repeat(AIType), batches, repeat(options))
+        results = [result for batch in mapGames(runLockstepGames, args, len(batches), workers) for result in batch]
+    else:
+        args = (repeat(numRows), repeat(numCols), repeat(numBombs), repeat(safeSquare), repeat(AIType), seeds, repeat(options), repeat(trace))
+        results = mapGames(runGame, args, numGames, workers)
+
+    for i, result in enumerate(results):
+        result['board'] = i
+    return results
+
+# play every board of a corpus file over a pool of workers, results come back in board order.
+# With lockstep > 0 the boards are played lockstep at a time, as in runGames
+def runCorpus(corpusFilename, AIType, workers=1, masterSeed=None, options=None, trace=0, lockstep=0):
+    numBoards = len(minesweeperCorpus.Corpus(corpusFilename))
+    seeds = gameSeeds(masterSeed, numBoards)
+    if not lockstep:
+        args = (repeat(corpusFilename), range(numBoards), repeat(AIType), seeds, repeat(options), repeat(trace))
+        return mapGames(runCorpusGame, args, numBoards, workers)
+
+    batches = lockstepBatches(seeds, lockstep)
+    boards = lockstepBatches(list(range(numBoards)), lockstep)
+    args = (repeat(corpusFilename), boards, repeat(AIType), batches, repeat(options))
+    results = [result for batch in mapGames(runLockstepCorpus, args, len(batches), workers) for result in batch]
+    for i, result in enumerate(results):
+        result['board'] = i
+    return results
+
+# combine per-game results into the totals the benchmark summary is printed from
+def combineResults(results):
+    totals = {
+        'numGames': len(results),
+        'numWins': sum(1 for result in results if result['outcome'] == 1),
+        'numLosses': sum(1 for result in results if result['outcome'] == -1),
+        'totalDigs': sum(result['digs'] for result in results),
+        'totalTime': sum(result['time'] for result in results),
+    }
+    for key in ('total_sat_variables', 'total_sat_solve_steps', 'total_sat_solves', 'total_sat_probes_skipped', 'total_component_cache_hits',
+                'cells_resolved_counting', 'cells_resolved_subset', 'cells_resolved_sat',
+                'total_components_counted', 'total_probability_cache_hits',
+                'moves', 'encode_time', 'search_time', 'recomputes', 'recompute_sat_calls', 'frontier_cells',
+                'query_variables', 'query_clauses'):
+        totals[key] = sum(result.get(key, 0) for result in results)
+
+    # move latency over every move of every game
+    totals['latency_histogram'] = np.sum([result['latency_histogram'] for result in results], axis=0) if results else []
+    for q in minesweeperMetrics.PERCENTILES:
+        totals[f'latency_p{q}'] = minesweeperMetrics.histogram_percentile(totals['latency_histogram'], q)
+    worst = max(range(len(results)), key=lambda i: results[i]['worst_move_time'], default=None)
+    totals['worst_game'] = worst
+    totals['worst_move'] = results[worst]['worst_move'] if worst is not None else -1
+    totals['worst_move_time'] = results[worst]['worst_move_time'] if worst is not None else 0.0
+    return totals
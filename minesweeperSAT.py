@@ -0,0 +1,249 @@
+# A small, self-contained CDCL SAT solver.
+# Clauses are lists of DIMACS style int literals (v or -v) kept in one array and addressed by index.
+# Propagation uses two watched literals per clause, conflicts are analysed to the first UIP and the
+# learnt clause is kept, and the search runs on an explicit trail, so nothing recurses.
+# Clauses can be added between calls to solve(), and solve() takes assumptions, so one instance can
+# answer a whole series of "can this cell be a bomb?" probes.
+
+class CDCLSolver:
+
+    def __init__(self, num_vars=0):
+        self.num_vars = 0
+        self.clauses = []
+        self.watches = [[], []]  # literal index -> indices of clauses watching that literal
+        self.value = [0]  # variable -> 1 true, -1 false, 0 unassigned
+        self.level = [0]
+        self.reason = [-1]  # variable -> index of the clause that implied it, -1 for decisions
+        self.phase = [-1]  # variable -> polarity it last had, tried first when deciding
+        self.activity = [0.0]
+
+        self.trail = []  # assigned literals in assignment order
+        self.trail_lim = []  # trail length at the start of every decision level
+        self.qhead = 0  # next trail position to propagate
+        self.ok = True  # False once the clauses are unsatisfiable without any assumptions
+        self.bump = 1.0
+        self.model = None
+
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+
+        self.reserve(num_vars)
+
+    # make sure variables 1..num_vars exist
+    def reserve(self, num_vars):
+        while self.num_vars < num_vars:
+            self.num_vars += 1
+            self.watches.append([])
+            self.watches.append([])
+            self.value.append(0)
+            self.level.append(0)
+            self.reason.append(-1)
+            self.phase.append(-1)
+            self.activity.append(0.0)
+
+    @staticmethod
+    def index(lit):
+        return 2 * lit if lit > 0 else -2 * lit + 1
+
+    def lit_value(self, lit):
+        value = self.value[abs(lit)]
+        return value if lit > 0 else -value
+
+    def decision_level(self):
+        return len(self.trail_lim)
+
+    def add_clause(self, lits):
+        if not self.ok:
+            return
+        assert self.decision_level() == 0
+        self.reserve(max((abs(lit) for lit in lits), default=0))
+
+        clause = []
+        for lit in lits:
+            value = self.lit_value(lit)
+            if value == 1 or -lit in clause:
+                return # already satisfied
+            if value == 0 and lit not in clause:
+                clause.append(lit)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.enqueue(clause[0], -1)
+            self.ok = self.propagate() == -1
+        else:
+            self.attach(clause)
+
+    def attach(self, clause):
+        self.clauses.append(clause)
+        ci = len(self.clauses) - 1
+        self.watches[self.index(clause[0])].append(ci)
+        self.watches[self.index(clause[1])].append(ci)
+        return ci
+
+    def enqueue(self, lit, reason):
+        var = abs(lit)
+        self.value[var] = 1 if lit > 0 else -1
+        self.level[var] = self.decision_level()
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    # unit propagation over the two watched literals, returns a conflicting clause index or -1
+    def propagate(self):
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+
+            watching = self.watches[self.index(false_lit)]
+            kept = []
+            i = 0
+            while i < len(watching):
+                ci = watching[i]
+                i += 1
+                clause = self.clauses[ci]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                if self.lit_value(clause[0]) == 1:
+                    kept.append(ci)
+                    continue
+
+                # look for a literal that is not false to watch instead
+                for k in range(2, len(clause)):
+                    if self.lit_value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[self.index(clause[1])].append(ci)
+                        break
+                else:
+                    kept.append(ci)
+                    if self.lit_value(clause[0]) == -1:
+                        kept.extend(watching[i:])
+                        self.watches[self.index(false_lit)] = kept
+                        return ci
+                    self.enqueue(clause[0], ci)
+
+            self.watches[self.index(false_lit)] = kept
+        return -1
+
+    # first UIP conflict analysis, returns the learnt clause (asserting literal first) and the level to jump back to
+    def analyze(self, conflict):
+        seen = set()
+        learnt = [0]
+        counter = 0
+        lit = 0
+        ti = len(self.trail) - 1
+        ci = conflict
+        current = self.decision_level()
+
+        while True:
+            for q in self.clauses[ci]:
+                if q == lit:
+                    continue
+                var = abs(q)
+                if var in seen or self.level[var] == 0:
+                    continue
+                seen.add(var)
+                self.activity[var] += self.bump
+                if self.level[var] == current:
+                    counter += 1
+                else:
+                    learnt.append(q)
+
+            while abs(self.trail[ti]) not in seen:
+                ti -= 1
+            lit = self.trail[ti]
+            ti -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            ci = self.reason[abs(lit)]
+            seen.discard(abs(lit))
+
+        learnt[0] = -lit
+        self.bump *= 1.05
+
+        back_level = 0
+        if len(learnt) > 1:
+            best = max(range(1, len(learnt)), key=lambda k: self.level[abs(learnt[k])])
+            learnt[1], learnt[best] = learnt[best], learnt[1]
+            back_level = self.level[abs(learnt[1])]
+        return learnt, back_level
+
+    def cancel_until(self, level):
+        if self.decision_level() <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            self.phase[var] = self.value[var]
+            self.value[var] = 0
+            self.reason[var] = -1
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def pick_branch_var(self):
+        best = 0
+        best_activity = -1.0
+        for var in range(1, self.num_vars + 1):
+            if self.value[var] == 0 and self.activity[var] > best_activity:
+                best = var
+                best_activity = self.activity[var]
+        return best
+
+    # returns 'sat' or 'unsat'. On 'sat' the assignment is kept in self.model (index = variable).
+    def solve(self, assumptions=()):
+        self.model = None
+        if not self.ok:
+            return 'unsat'
+        self.reserve(max((abs(lit) for lit in assumptions), default=0))
+
+        result = None
+        while result is None:
+            conflict = self.propagate()
+            if conflict != -1:
+                self.conflicts += 1
+                if self.decision_level() == 0:
+                    self.ok = False
+                    result = 'unsat'
+                    break
+                learnt, back_level = self.analyze(conflict)
+                self.cancel_until(back_level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], -1)
+                else:
+                    self.enqueue(learnt[0], self.attach(learnt))
+                continue
+
+            # assumptions take the first decision levels, in order
+            next_lit = 0
+            while self.decision_level() < len(assumptions):
+                lit = assumptions[self.decision_level()]
+                value = self.lit_value(lit)
+                if value == 1:
+                    self.trail_lim.append(len(self.trail)) # already true, open an empty level for it
+                elif value == -1:
+                    result = 'unsat' # the assumptions contradict the clauses
+                    break
+                else:
+                    next_lit = lit
+                    break
+            if result is not None:
+                break
+
+            if next_lit == 0:
+                var = self.pick_branch_var()
+                if var == 0:
+                    self.model = list(self.value)
+                    result = 'sat'
+                    break
+                next_lit = var if self.phase[var] == 1 else -var
+
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(next_lit, -1)
+
+        self.cancel_until(0)
+        return result
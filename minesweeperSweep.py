@@ -0,0 +1,144 @@
+import numpy as np
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import minesweeperBackends
+import minesweeperResults
+import minesweeperRunner
+
+# Density/size sweeps: play num_games generated games at every (rows, cols, density) point of a grid.
+# All points share one worker pool, and every game is appended to a JSON Lines results file as soon as its
+# batch finishes. Rerunning the same sweep skips the games already in the file, so a crashed sweep resumes
+# where it stopped. Game i of a point always gets the same seed (derived from the master seed and the point).
+
+# parse a range "lo:hi:step" (inclusive) or a list "a,b,c" of ints
+def int_range(text):
+    if ':' in text:
+        lo, hi, step = (int(x) for x in (text.split(':') + ['1'])[:3])
+        return list(range(lo, hi + 1, step))
+    return [int(x) for x in text.split(',')]
+
+# parse board sizes "20x10,20x15"
+def size_list(text):
+    return [tuple(int(x) for x in size.split('x')) for size in text.split(',')]
+
+class Point:
+
+    def __init__(self, numRows, numCols, density, algo, backend, masterSeed, numGames):
+        self.numRows = numRows
+        self.numCols = numCols
+        self.density = density  # percent
+        self.numBombs = round(numRows * numCols * density / 100)
+        self.safeSquare = (numRows // 2, numCols // 2)
+        self.context = minesweeperResults.run_context(numRows, numCols, self.numBombs, algo, backend)
+        entropy = [masterSeed, numRows, numCols, self.numBombs]
+        self.seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(entropy).spawn(numGames)]
+
+    # identifies game `board` of this point in a results file
+    def key(self, board):
+        context = self.context
+        return (context['numRows'], context['numCols'], context['numBombs'], context['algo'], context['backend'], board, self.seeds[board])
+
+def record_key(record):
+    return (record['numRows'], record['numCols'], record['numBombs'], record['algo'], record['backend'], record['board'], record['seed'])
+
+# play every game of points not already in the results file, appending records as batches finish
+def run_sweep(points, algo, output, workers=1, options=None, batchSize=None):
+    records = minesweeperResults.read_results(output) if os.path.exists(output) else []
+    done = set(record_key(record) for record in records)
+
+    batches = []
+    for point in points:
+        todo = [board for board in range(len(point.seeds)) if point.key(board) not in done]
+        size = batchSize or max(1, len(point.seeds) // (max(workers, 1) * 4))
+        for start in range(0, len(todo), size):
+            boards = todo[start:start + size]
+            batches.append((point, boards))
+    numGames = sum(len(boards) for point, boards in batches)
+    print(f'{len(points)} points, {len(done)} games already in {output}, {numGames} to play')
+
+    def args(point, boards):
+        return (point.numRows, point.numCols, point.numBombs, point.safeSquare, algo, boards, [point.seeds[board] for board in boards], options)
+
+    with open(output, 'a') as fp:
+        if workers <= 1:
+            for point, boards in batches:
+                for result in minesweeperRunner.runGameBatch(*args(point, boards)):
+                    records.append(minesweeperResults.make_record(result, point.context))
+                    minesweeperResults.append_record(fp, records[-1])
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = {pool.submit(minesweeperRunner.runGameBatch, *args(point, boards)): point for point, boards in batches}
+                for future in as_completed(pending):
+                    for result in future.result():
+                        records.append(minesweeperResults.make_record(result, pending[future].context))
+                        minesweeperResults.append_record(fp, records[-1])
+    return records
+
+# one row of a sweep table
+def table_row(label, records):
+    times = [t for record in records for t in record.get('move_times', [])]
+    numGames = len(records)
+    return [label, numGames, sum(1 for record in records if record['outcome'] == 1),
+            round(sum(record['time'] for record in records) / numGames, 4),
+            round(sum(record['digs'] for record in records) / numGames, 1),
+            round(1000 * float(np.percentile(times, 99)), 3) if times else 0.0]
+
+def print_table(title, header, rows):
+    header = [header, 'games', 'wins', 'averageTime', 'averageDigs', 'p99 ms']
+    widths = [max(len(str(row[i])) for row in rows + [header]) for i in range(len(header))]
+    print(title)
+    for row in [header] + rows:
+        print('  '.join(str(cell).rjust(width) for cell, width in zip(row, widths)))
+    print('')
+
+# time-vs-density for every board size and time-vs-size for every density, over the sweep's records
+def print_tables(points, records):
+    byPoint = {}
+    for record in records:
+        byPoint.setdefault((record['numRows'], record['numCols'], record['numBombs']), []).append(record)
+
+    sizes = sorted(set((point.numRows, point.numCols) for point in points))
+    densities = sorted(set(point.density for point in points))
+    for numRows, numCols in sizes:
+        rows = [table_row(f'{point.density}%', byPoint[(point.numRows, point.numCols, point.numBombs)])
+                for point in sorted(points, key=lambda point: point.density)
+                if (point.numRows, point.numCols) == (numRows, numCols) and (point.numRows, point.numCols, point.numBombs) in byPoint]
+        if len(rows) > 1:
+            print_table(f'time vs density, {numRows}x{numCols}', 'density', rows)
+    for density in densities:
+        rows = [table_row(f'{point.numRows}x{point.numCols}', byPoint[(point.numRows, point.numCols, point.numBombs)])
+                for point in sorted(points, key=lambda point: point.numRows * point.numCols)
+                if point.density == density and (point.numRows, point.numCols, point.numBombs) in byPoint]
+        if len(rows) > 1:
+            print_table(f'time vs size, {density}% bombs', 'size', rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='minesweeperPerformanceTest.py sweep', description='play a grid of board sizes and densities')
+    parser.add_argument('--rows', default='20', type=int_range, help='board rows, "lo:hi:step" or "a,b,c" (default 20)')
+    parser.add_argument('--cols', default='20', type=int_range, help='board columns, same format (default 20)')
+    parser.add_argument('--sizes', type=size_list, help='explicit board sizes "20x10,20x15", instead of every rows x cols pair')
+    parser.add_argument('--density', default='10', type=int_range, help='bomb density in percent, same format (default 10)')
+    parser.add_argument('--games', default=10, type=int, help='games per point')
+    parser.add_argument('--algo', default=2, type=int, choices=[1, 2, 3])
+    parser.add_argument('--backend', choices=sorted(minesweeperBackends.BACKENDS), help='solver backend for algo 2')
+    parser.add_argument('-j', '--workers', default=1, type=int, help='size of the worker pool shared by all points')
+    parser.add_argument('--seed', default=0, type=int, help='master seed')
+    parser.add_argument('-o', '--output', default='sweep.jsonl', help='JSON Lines results file, appended to and resumed from')
+    args = parser.parse_args(argv)
+    if args.backend and args.algo != 2:
+        parser.error('--backend picks the solver of algo 2')
+    if minesweeperResults.file_format(args.output) != 'jsonl':
+        parser.error('sweeps append to a .jsonl results file')
+
+    sizes = args.sizes or [(numRows, numCols) for numRows in args.rows for numCols in args.cols]
+    points = [Point(numRows, numCols, density, args.algo, args.backend, args.seed, args.games)
+              for numRows, numCols in sizes for density in args.density]
+    options = {'backend': args.backend} if args.backend else None
+
+    records = run_sweep(points, args.algo, args.output, workers=args.workers, options=options)
+    keys = set(point.key(board) for point in points for board in range(args.games))
+    print_tables(points, [record for record in records if record_key(record) in keys])
+
+if __name__ == '__main__':
+    main()